@@ -0,0 +1,514 @@
+"""
+Local fake of the Neon API endpoints used by the cron jobs, serving synthetic accounts
+"""
+
+# pylint: disable=import-error
+
+import asyncio
+import datetime
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+from helpers.enums import NeonEventCategory
+
+EVENT_CATEGORIES = [c for c in NeonEventCategory if c != NeonEventCategory.NONE]
+EVENT_NAMES = {
+    NeonEventCategory.WOODSHOP_SAFETY: "Woodshop Safety",
+    NeonEventCategory.METALWORKING: "Metal Shop Safety",
+    NeonEventCategory.CNC: "CNC Router Certification",
+    NeonEventCategory.LASERS: "Laser Cutter Certification",
+    NeonEventCategory.PRINTING_3D: "Intro to 3D Printing",
+}
+# Account custom fields by ID, as listed by /v2/customFields
+CUSTOM_FIELDS = {
+    75: "OpenPathID",
+    76: "DiscourseID",
+    77: "Family Group Sub Member",
+    78: "FamilyGroupPrimaryMember",
+    79: "WaiverDate",
+    80: "FacilityTourDate",
+    81: "Referral Source",
+}
+
+
+@dataclass
+class FaultConfig:
+    """Failures injected into responses, as probabilities per request."""
+
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    # Requests per second accepted before answering 429, like Neon's per key limit
+    rate_limit: float | None = None
+    # Response time range in seconds
+    latency: tuple[float, float] = (0.0, 0.0)
+    # Seconds sent in the Retry-After header of 429 responses
+    retry_after: float = 1.0
+
+
+@dataclass
+class FakeAccount:
+    neon_id: int
+    first_name: str
+    last_name: str
+    email: str
+    zip_code: str
+    status: str
+    last_modified: str
+    custom_fields: list[dict]
+    individual_types: list[str] = field(default_factory=list)
+    memberships: list[dict] = field(default_factory=list)
+    registrations: list[dict] = field(default_factory=list)
+    donations: list[dict] = field(default_factory=list)
+
+
+def generate_accounts(
+    count: int, seed: int = 0, event_count: int | None = None
+) -> tuple[dict[int, FakeAccount], dict[int, dict]]:
+    """
+    Deterministic synthetic accounts and the events they registered for, one event per
+    ten accounts unless event_count is given.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+
+    if event_count is None:
+        event_count = count // 10
+
+    events = {}
+    for event_id in range(1, max(2, event_count) + 1):
+        category = rng.choice(EVENT_CATEGORIES)
+        events[event_id] = {
+            "id": str(event_id),
+            "name": f"{EVENT_NAMES.get(category, category.value)} w/ Instructor",
+            "category": {"name": category.value},
+            "eventDates": {
+                "startDate": (
+                    today - datetime.timedelta(days=rng.randint(1, 1500))
+                ).isoformat()
+            },
+        }
+
+    accounts = {}
+    for neon_id in range(1000, 1000 + count):
+        start = today - datetime.timedelta(days=rng.randint(30, 2000))
+        memberships = []
+        while start < today:
+            annual = rng.random() < 0.2
+            end = start + datetime.timedelta(days=365 if annual else 30)
+            memberships.append(
+                {
+                    "status": "SUCCEEDED",
+                    "fee": 750 if annual else 75,
+                    "termUnit": "YEAR" if annual else "MONTH",
+                    "termStartDate": start.isoformat(),
+                    "termEndDate": end.isoformat(),
+                }
+            )
+            # Some members lapse for a while before rejoining
+            start = end + datetime.timedelta(
+                days=1 if rng.random() < 0.9 else rng.randint(30, 400)
+            )
+            if rng.random() < 0.02:
+                break
+
+        status = (
+            "Active"
+            if memberships[-1]["termEndDate"] >= today.isoformat()
+            else "Inactive"
+        )
+
+        accounts[neon_id] = FakeAccount(
+            neon_id=neon_id,
+            first_name=f"First{neon_id}",
+            last_name=f"Last{neon_id}",
+            email=f"member{neon_id}@example.com",
+            zip_code=str(rng.choice([78754, 78753, 78752, 78741, 78745, 78660])),
+            status=status,
+            last_modified=f"{today.isoformat()}T00:00:00Z",
+            custom_fields=[
+                {"name": "WaiverDate", "value": "01/15/2023"},
+                {"name": "FacilityTourDate", "value": "01/20/2023"},
+                {"name": "OpenPathID", "value": str(neon_id)},
+                {
+                    "name": "Referral Source",
+                    "optionValues": [{"name": "Word of Mouth"}],
+                },
+            ],
+            individual_types=["Volunteer"] if rng.random() < 0.1 else [],
+            memberships=memberships,
+            registrations=[
+                {
+                    "eventId": str(rng.choice(list(events))),
+                    "registrationAmount": rng.choice([0, 45, 90]),
+                    "registrationDateTime": "2023-01-01T00:00:00Z",
+                    "tickets": [{"attendees": [{"registrationStatus": "SUCCEEDED"}]}],
+                }
+                for _ in range(rng.randint(0, 8))
+            ],
+            donations=[
+                {"date": "2023-06-01", "amount": rng.choice([10, 25, 100])}
+                for _ in range(rng.randint(0, 2))
+            ],
+        )
+
+    return accounts, events
+
+
+def paginate(items: list, page: int, page_size: int) -> tuple[list, dict]:
+    """One page of items and the pagination object Neon returns with it."""
+    return items[page * page_size : (page + 1) * page_size], {
+        "currentPage": page,
+        "pageSize": page_size,
+        "totalPages": math.ceil(len(items) / page_size),
+        "totalResults": len(items),
+    }
+
+
+def membership_fields(membership: dict | None) -> dict[str, str]:
+    """Account search output fields describing a membership."""
+    if membership is None:
+        return {}
+
+    return {
+        "Membership Start Date": membership["termStartDate"],
+        "Membership Expiration Date": membership["termEndDate"],
+        "Membership Cost": str(membership["fee"]),
+        "Membership Term Unit": membership["termUnit"],
+    }
+
+
+def matches(value: str | None, search_field: dict) -> bool:
+    """Compare a date with a search field, as Neon's date operators do."""
+    if value is None:
+        return False
+
+    other = search_field["value"]
+
+    return {
+        "EQUAL": value == other,
+        "GREATER_THAN": value > other,
+        "GREATER_AND_EQUAL": value >= other,
+        "LESS_THAN": value < other,
+        "LESS_AND_EQUAL": value <= other,
+    }[search_field["operator"]]
+
+
+class FakeNeon:
+    """aiohttp application answering the Neon API requests made by helpers.get_neon_data."""
+
+    def __init__(
+        self,
+        accounts: int,
+        faults: FaultConfig,
+        seed: int = 0,
+        events: int | None = None,
+    ):
+        self.accounts, self.events = generate_accounts(accounts, seed, events)
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.injected = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+        self.event_registrations: dict[int, list[dict]] = defaultdict(list)
+        for acct in self.accounts.values():
+            for registration in acct.registrations:
+                self.event_registrations[int(registration["eventId"])].append(
+                    registration | {"registrantAccountId": str(acct.neon_id)}
+                )
+
+    def _search_value(
+        self, acct: FakeAccount, name: str | int, membership: dict | None = None
+    ) -> str | None:
+        if name in CUSTOM_FIELDS:
+            for custom_field in acct.custom_fields:
+                if custom_field["name"] == CUSTOM_FIELDS[name]:
+                    options = custom_field.get("optionValues") or []
+                    return custom_field.get("value") or "|".join(
+                        o["name"] for o in options
+                    )
+            return ""
+
+        return {
+            "Account ID": str(acct.neon_id),
+            "First Name": acct.first_name,
+            "Last Name": acct.last_name,
+            "Email 1": acct.email,
+            "Phone 1 Full Number (F)": "512-555-0100",
+            "Gender": "Female",
+            "DOB Year": "1990",
+            "DOB Month": "06",
+            "DOB Day": "15",
+            "Address Line 1": f"{acct.neon_id} Main St",
+            "City": "Austin",
+            "State/Province": "TX",
+            "Zip Code": acct.zip_code,
+            "Individual Type": "|".join(acct.individual_types),
+            "Account Current Membership Status": acct.status,
+            "Account Last Modified Date/Time": acct.last_modified,
+            **membership_fields(membership),
+        }.get(name)
+
+    def _search_key(self, name: str | int) -> str:
+        """Results are keyed by field name, custom fields included."""
+        return CUSTOM_FIELDS.get(name, name)
+
+    def _over_rate_limit(self) -> bool:
+        if self.faults.rate_limit is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+
+        return self._window_count > self.faults.rate_limit
+
+    @web.middleware
+    async def faults_middleware(self, request: web.Request, handler) -> web.Response:
+        self.requests += 1
+
+        low, high = self.faults.latency
+        if high > 0:
+            await asyncio.sleep(self.rng.uniform(low, high))
+
+        if self._over_rate_limit() or self.rng.random() < self.faults.throttle_rate:
+            self.injected += 1
+            return web.Response(
+                status=429, headers={"Retry-After": str(self.faults.retry_after)}
+            )
+
+        if self.rng.random() < self.faults.error_rate:
+            self.injected += 1
+            return web.Response(status=502)
+
+        return await handler(request)
+
+    def _account(self, request: web.Request) -> FakeAccount:
+        try:
+            return self.accounts[int(request.match_info["neon_id"])]
+        except (KeyError, ValueError) as e:
+            raise web.HTTPNotFound() from e
+
+    async def search_accounts(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        page = body["pagination"]["currentPage"]
+        page_size = body["pagination"]["pageSize"]
+
+        search_fields = {f["field"]: f for f in body["searchFields"]}
+
+        accounts = list(self.accounts.values())
+
+        # One row per account with its latest membership, or per membership
+        if search_fields.get("Most Recent Membership Only", {}).get("value") == "No":
+            rows = [(a, m) for a in accounts for m in a.memberships]
+        else:
+            rows = [(a, a.memberships[-1] if a.memberships else None) for a in accounts]
+
+        for search_field in body["searchFields"]:
+            if search_field["field"] in (
+                "Membership Start Date",
+                "Membership Expiration Date",
+            ):
+                rows = [
+                    (a, m)
+                    for a, m in rows
+                    if matches(
+                        membership_fields(m).get(search_field["field"]), search_field
+                    )
+                ]
+
+        results, pagination = paginate(rows, page, page_size)
+
+        return web.json_response(
+            {
+                "searchResults": [
+                    {
+                        self._search_key(name): self._search_value(a, name, m)
+                        for name in body["outputFields"]
+                    }
+                    for a, m in results
+                ],
+                "pagination": pagination,
+            }
+        )
+
+    async def search_donations(self, request: web.Request) -> web.Response:
+        body = await request.json()
+
+        rows = [
+            {
+                "Account ID": str(a.neon_id),
+                "Donation Date": d["date"],
+                "Donation Amount": str(d["amount"]),
+            }
+            for a in self.accounts.values()
+            for d in a.donations
+        ]
+        for search_field in body["searchFields"]:
+            if search_field["field"] == "Donation Date":
+                rows = [r for r in rows if matches(r["Donation Date"], search_field)]
+
+        results, pagination = paginate(
+            rows, body["pagination"]["currentPage"], body["pagination"]["pageSize"]
+        )
+
+        return web.json_response(
+            {
+                "searchResults": [
+                    {name: r.get(name) for name in body["outputFields"]}
+                    for r in results
+                ],
+                "pagination": pagination,
+            }
+        )
+
+    async def search_events(self, request: web.Request) -> web.Response:
+        body = await request.json()
+
+        events = list(self.events.values())
+        for search_field in body["searchFields"]:
+            if search_field["field"] == "Event Start Date":
+                events = [
+                    e
+                    for e in events
+                    if matches(e["eventDates"]["startDate"], search_field)
+                ]
+
+        results, pagination = paginate(
+            events, body["pagination"]["currentPage"], body["pagination"]["pageSize"]
+        )
+
+        return web.json_response(
+            {
+                "searchResults": [
+                    {
+                        name: {
+                            "Event ID": e["id"],
+                            "Event Name": e["name"],
+                            "Event Start Date": e["eventDates"]["startDate"],
+                            "Event Category Name": e["category"]["name"],
+                        }.get(name)
+                        for name in body["outputFields"]
+                    }
+                    for e in results
+                ],
+                "pagination": pagination,
+            }
+        )
+
+    async def get_account(self, request: web.Request) -> web.Response:
+        acct = self._account(request)
+
+        return web.json_response(
+            {
+                "individualAccount": {
+                    "accountId": str(acct.neon_id),
+                    "primaryContact": {
+                        "firstName": acct.first_name,
+                        "lastName": acct.last_name,
+                        "email1": acct.email,
+                        "gender": {"name": "Female"},
+                        "dob": {"year": "1990", "month": "06", "day": "15"},
+                        "addresses": [
+                            {
+                                "isPrimaryAddress": True,
+                                "addressLine1": f"{acct.neon_id} Main St",
+                                "city": "Austin",
+                                "stateProvince": {"code": "TX"},
+                                "zipCode": acct.zip_code,
+                                "phone1": "512-555-0100",
+                            }
+                        ],
+                    },
+                    "accountCustomFields": acct.custom_fields,
+                    "individualTypes": [
+                        {"name": name} for name in acct.individual_types
+                    ],
+                }
+            }
+        )
+
+    async def get_custom_fields(self, request: web.Request) -> web.Response:
+        if request.query.get("category") != "Account":
+            return web.json_response([])
+
+        return web.json_response(
+            [
+                {"id": str(field_id), "name": name, "component": "Account"}
+                for field_id, name in CUSTOM_FIELDS.items()
+            ]
+        )
+
+    async def get_memberships(self, request: web.Request) -> web.Response:
+        return web.json_response({"memberships": self._account(request).memberships})
+
+    async def get_registrations(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"eventRegistrations": self._account(request).registrations}
+        )
+
+    async def get_donations(self, request: web.Request) -> web.Response:
+        return web.json_response({"donations": self._account(request).donations})
+
+    async def get_event(self, request: web.Request) -> web.Response:
+        try:
+            return web.json_response(self.events[int(request.match_info["event_id"])])
+        except (KeyError, ValueError) as e:
+            raise web.HTTPNotFound() from e
+
+    async def get_event_registrations(self, request: web.Request) -> web.Response:
+        try:
+            registrations = self.event_registrations[
+                int(request.match_info["event_id"])
+            ]
+        except ValueError as e:
+            raise web.HTTPNotFound() from e
+
+        results, pagination = paginate(
+            registrations,
+            int(request.query.get("currentPage", 0)),
+            int(request.query.get("pageSize", 20)),
+        )
+
+        return web.json_response(
+            {"eventRegistrations": results, "pagination": pagination}
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.faults_middleware])
+        app.router.add_post("/v2/accounts/search", self.search_accounts)
+        app.router.add_get("/v2/accounts/{neon_id}", self.get_account)
+        app.router.add_get("/v2/accounts/{neon_id}/memberships", self.get_memberships)
+        app.router.add_get(
+            "/v2/accounts/{neon_id}/eventRegistrations", self.get_registrations
+        )
+        app.router.add_get("/v2/accounts/{neon_id}/donations", self.get_donations)
+        app.router.add_post("/v2/events/search", self.search_events)
+        app.router.add_post("/v2/donations/search", self.search_donations)
+        app.router.add_get("/v2/events/{event_id}", self.get_event)
+        app.router.add_get(
+            "/v2/events/{event_id}/eventRegistrations", self.get_event_registrations
+        )
+        app.router.add_get("/v2/customFields", self.get_custom_fields)
+        return app
+
+
+async def start_fake_neon(
+    fake: FakeNeon, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Serve fake in the running event loop, returning the runner and its base URL."""
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+
+    return runner, f"http://{host}:{port}"
@@ -0,0 +1,245 @@
+"""
+Benchmark the Neon fetchers used by the nightly jobs against a local fake Neon API.
+
+Run from the cron_service directory, with the same environment as the cron jobs:
+
+    python -m benchmarks.run_benchmark --accounts 2000 --scenario accounts --rate-limit 30
+
+--rate-limit is the rate the fake server accepts before answering 429, --max-rps the rate
+the client's limiter starts at (NEON_MAX_REQUESTS_PER_SECOND by default).
+"""
+
+# pylint: disable=import-error
+
+import argparse
+import asyncio
+import itertools
+import logging
+import statistics
+import time
+
+import aiohttp
+
+from helpers.neon_client import configure_limiter, endpoint_stats, log_endpoint_stats
+from helpers.neon_creds import N_MAX_REQUESTS_PER_SECOND
+from helpers.get_neon_data import (
+    get_all_accounts,
+    get_acct_membership_data,
+    get_individual_account,
+    get_account_detail_output_fields,
+    get_searched_account,
+)
+from helpers.event_catalogue import EventCatalogue
+from helpers.registration_index import RegistrationIndex
+from helpers.account_history import AccountHistory
+from benchmarks.fake_neon import FakeNeon, FaultConfig, start_fake_neon
+
+SEARCH_FIELDS = [{"field": "Account Type", "operator": "EQUAL", "value": "Individual"}]
+OUTPUT_FIELDS = ["Account ID", "Account Current Membership Status"]
+
+
+async def bench_search(session: aiohttp.ClientSession, concurrency: int) -> int:
+    """Page through every account, as the nightly account searches do."""
+    count = 0
+    async for page in get_all_accounts(
+        session, SEARCH_FIELDS, OUTPUT_FIELDS, prefetch=concurrency
+    ):
+        count += len(page["searchResults"])
+    return count
+
+
+async def run_workers(
+    session: aiohttp.ClientSession,
+    concurrency: int,
+    fetch_account,
+    output_fields: list[str | int] = OUTPUT_FIELDS,
+) -> int:
+    """Fetch every account found by the search with a pool of workers."""
+    queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=concurrency * 2)
+    done = 0
+
+    async def worker() -> None:
+        nonlocal done
+        while True:
+            result = await queue.get()
+            try:
+                await fetch_account(result)
+                done += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                logging.exception("Failed to fetch account %s", result["Account ID"])
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+    async for page in get_all_accounts(session, SEARCH_FIELDS, output_fields):
+        for result in page["searchResults"]:
+            await queue.put(result)
+
+    await queue.join()
+    for w in workers:
+        w.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+    return done
+
+
+async def bench_accounts(session: aiohttp.ClientSession, concurrency: int) -> int:
+    """Fetch full accounts, as daily_risk_update does."""
+    return await run_workers(
+        session,
+        concurrency,
+        lambda r: get_individual_account(
+            session, r["Account ID"], r["Account Current Membership Status"]
+        ),
+    )
+
+
+async def bench_bulk_accounts(session: aiohttp.ClientSession, concurrency: int) -> int:
+    """Build full accounts from the account search, as daily_risk_update does in bulk."""
+    output_fields = OUTPUT_FIELDS + await get_account_detail_output_fields(session)
+
+    return await run_workers(
+        session,
+        concurrency,
+        lambda r: get_searched_account(session, r),
+        output_fields,
+    )
+
+
+async def bench_synced_accounts(
+    session: aiohttp.ClientSession, concurrency: int
+) -> int:
+    """
+    Build full accounts from the account search with event registrations, memberships
+    and donations synced up front, as daily_risk_update does with RISK_EVENT_SYNC and
+    RISK_HISTORY_SYNC.
+    """
+    registrations = RegistrationIndex()
+    history = AccountHistory()
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(
+            registrations.sync(session, EventCatalogue(), concurrency=concurrency)
+        )
+        tg.create_task(history.sync_memberships(session))
+        tg.create_task(history.sync_donations(session))
+
+    output_fields = OUTPUT_FIELDS + await get_account_detail_output_fields(session)
+
+    return await run_workers(
+        session,
+        concurrency,
+        lambda r: get_searched_account(session, r, registrations, history),
+        output_fields,
+    )
+
+
+async def bench_memberships(session: aiohttp.ClientSession, concurrency: int) -> int:
+    """Fetch membership history, as daily_membership_update verifies signups."""
+    return await run_workers(
+        session,
+        concurrency,
+        lambda r: get_acct_membership_data(session, r["Account ID"]),
+    )
+
+
+async def bench_bulk_memberships(
+    session: aiohttp.ClientSession, concurrency: int
+) -> int:
+    """Sync membership history through the account search, as daily_risk_update does."""
+    neon_ids = []
+    async for page in get_all_accounts(session, SEARCH_FIELDS, ["Account ID"]):
+        neon_ids.extend(r["Account ID"] for r in page["searchResults"])
+
+    history = AccountHistory()
+    await history.sync_memberships(session)
+
+    return sum(1 for neon_id in neon_ids if history.get_memberships(neon_id))
+
+
+SCENARIOS = {
+    "search": bench_search,
+    "accounts": bench_accounts,
+    "bulk-accounts": bench_bulk_accounts,
+    "synced-accounts": bench_synced_accounts,
+    "memberships": bench_memberships,
+    "bulk-memberships": bench_bulk_memberships,
+}
+
+
+def report(
+    scenario: str, accounts: int, elapsed: float, fake: FakeNeon, max_rps: float
+) -> None:
+    latencies = list(
+        itertools.chain.from_iterable(s.latencies for s in endpoint_stats.values())
+    )
+    quantiles = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    )
+
+    log_endpoint_stats()
+
+    print(f"scenario         {scenario}")
+    print(f"accounts         {accounts}")
+    print(f"elapsed          {elapsed:.2f}s")
+    print(f"accounts/s       {accounts / elapsed:.1f}")
+    print(f"max requests/s   {max_rps:g}")
+    print(f"requests         {sum(s.requests for s in endpoint_stats.values())}")
+    print(f"retries          {sum(s.retries for s in endpoint_stats.values())}")
+    print(f"throttled        {sum(s.throttled for s in endpoint_stats.values())}")
+    print(f"errors           {sum(s.errors for s in endpoint_stats.values())}")
+    print(f"faults injected  {fake.injected}")
+    print(f"latency p50      {quantiles[49] * 1000:.1f}ms")
+    print(f"latency p99      {quantiles[98] * 1000:.1f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scenario", choices=SCENARIOS, default="accounts")
+    parser.add_argument("--accounts", type=int, default=1000)
+    # Defaults to one event per ten accounts
+    parser.add_argument("--events", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--max-rps", type=float, default=N_MAX_REQUESTS_PER_SECOND)
+    parser.add_argument("--latency-ms", type=float, nargs=2, default=(0.0, 0.0))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    configure_limiter(args.max_rps)
+
+    fake = FakeNeon(
+        args.accounts,
+        FaultConfig(
+            throttle_rate=args.throttle_rate,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            latency=(args.latency_ms[0] / 1000, args.latency_ms[1] / 1000),
+        ),
+        seed=args.seed,
+        events=args.events,
+    )
+    runner, base_url = await start_fake_neon(fake)
+
+    try:
+        async with aiohttp.ClientSession(base_url=base_url) as session:
+            start = time.monotonic()
+            accounts = await SCENARIOS[args.scenario](session, args.concurrency)
+            elapsed = time.monotonic() - start
+    finally:
+        await runner.cleanup()
+
+    report(args.scenario, accounts, elapsed, fake, args.max_rps)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
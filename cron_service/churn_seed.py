@@ -1,40 +1,44 @@
 """Seed the database with the intitial member data"""
 
+import logging
 from pathlib import Path
 import polars as pl
 
-from engine import connection_uri
-
-
-def load_data_from_csv(file_path: str) -> pl.DataFrame:
-    """Load data from CSV file"""
-    return (
-        pl.scan_csv(file_path)
-        .select(
-            pl.col("neon_id"),
-            pl.col("first_name"),
-            pl.col("last_name"),
-            pl.col("email"),
-            pl.col("risk_score"),
-            pl.col("duration").alias("membership_duration"),
-            (pl.col("membership_cancelled") == False).alias("active"),
-        )
-        .collect()
+from helpers.copy_seed import csv_batches, seed_table, source_id
+
+from engine import engine
+from schema import Member
+
+
+def transform_batch(batch: pl.DataFrame) -> pl.DataFrame:
+    """Map a batch of the churn risk CSV to member table columns"""
+    return batch.select(
+        pl.col("neon_id"),
+        pl.col("first_name"),
+        pl.col("last_name"),
+        pl.col("email"),
+        pl.col("risk_score"),
+        pl.col("duration").alias("membership_duration"),
+        (pl.col("membership_cancelled") == False).alias("active"),
     )
 
 
-def write_db_from_csv(table_name: str, file_path: str, db_uri: str) -> None:
+def write_db_from_csv(file_path: Path) -> None:
     """Seed the database with the intitial member data"""
-    data = load_data_from_csv(file_path)
-
-    data.write_database(
-        table_name=table_name, connection=db_uri, if_table_exists="append"
+    seed_table(
+        engine,
+        Member.__table__,
+        (transform_batch(batch) for batch in csv_batches(file_path)),
+        conflict_columns=["neon_id"],
+        source=source_id(file_path),
     )
 
 
 if __name__ == "__main__":
-    write_db_from_csv(
-        table_name="member",
-        file_path=Path().cwd().joinpath("./data/asmbly_churn_risk.csv"),
-        db_uri=connection_uri,
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
     )
+
+    write_db_from_csv(Path().cwd().joinpath("./data/asmbly_churn_risk.csv"))
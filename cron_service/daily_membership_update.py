@@ -2,12 +2,14 @@ import asyncio
 import datetime
 import aiohttp
 import logging
+import os
 
 import sqlalchemy
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert as pg_upsert
 
-from helpers.neon_creds import N_HEADERS, N_BASE_URL
+from helpers.neon_client import create_neon_session, log_endpoint_stats
+from helpers.neon_cassette import run_date
 from helpers.get_neon_data import (
     get_all_accounts,
     get_acct_membership_data,
@@ -16,6 +18,9 @@ from helpers.get_neon_data import (
 from engine import engine
 from schema import MembershipCount, Member
 
+# Membership lookups made at once when verifying new signups
+SIGNUP_VERIFY_CONCURRENCY = int(os.environ.get("SIGNUP_VERIFY_CONCURRENCY", 10))
+
 
 async def get_active_members_count(session: aiohttp.ClientSession) -> int:
 
@@ -57,15 +62,12 @@ async def get_active_members_count(session: aiohttp.ClientSession) -> int:
     count = 0
 
     async for page in get_all_accounts(session, search_params, output_fields):
-        if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-            print(
-                f"Page {page['pagination']['currentPage'] + 1}",
-                "of",
-                page["pagination"]["totalPages"],
-            )
-            accts = page["searchResults"]
-        else:
-            break
+        print(
+            f"Page {page['pagination']['currentPage'] + 1}",
+            "of",
+            page["pagination"]["totalPages"],
+        )
+        accts = page["searchResults"]
 
         count += len(accts)
 
@@ -83,7 +85,7 @@ async def get_acct_signups_count(session: aiohttp.ClientSession) -> int:
         {
             "field": "Account Created Date",
             "operator": "EQUAL",
-            "value": (datetime.date.today() - datetime.timedelta(days=1)).isoformat(),
+            "value": (run_date() - datetime.timedelta(days=1)).isoformat(),
         },
     ]
 
@@ -92,19 +94,43 @@ async def get_acct_signups_count(session: aiohttp.ClientSession) -> int:
     count = 0
 
     async for page in get_all_accounts(session, search_params, output_fields):
-        if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-            accts = page["searchResults"]
-        else:
-            break
+        accts = page["searchResults"]
 
         count += len(accts)
 
     return count
 
 
+async def get_account_ids(
+    session: aiohttp.ClientSession, search_fields: list[dict]
+) -> list[str]:
+    """Find the IDs of all accounts matching the search fields."""
+    ids = []
+
+    async for page in get_all_accounts(session, search_fields, ["Account ID"]):
+        ids.extend(a["Account ID"] for a in page["searchResults"])
+
+    return ids
+
+
+async def is_member_signup(
+    session: aiohttp.ClientSession, neon_id: str, semaphore: asyncio.Semaphore
+) -> bool:
+    """Check whether the account's latest membership is a new signup or a rejoin."""
+    async with semaphore:
+        memberships = await get_acct_membership_data(session, neon_id)
+
+    if len(memberships) <= 1:
+        return len(memberships) == 1
+
+    gap = memberships[-1].start_date - memberships[-2].end_date
+
+    return gap > datetime.timedelta(days=1)
+
+
 async def get_churns_and_signups_count(
     session: aiohttp.ClientSession,
-) -> tuple[int, int]:
+) -> tuple[list[str], list[str]]:
 
     base = [
         {
@@ -135,7 +161,7 @@ async def get_churns_and_signups_count(
         {
             "field": "Membership Expiration Date",
             "operator": "EQUAL",
-            "value": (datetime.date.today() - datetime.timedelta(days=1)).isoformat(),
+            "value": (run_date() - datetime.timedelta(days=1)).isoformat(),
         }
     )
 
@@ -145,43 +171,30 @@ async def get_churns_and_signups_count(
         {
             "field": "Membership Start Date",
             "operator": "EQUAL",
-            "value": (datetime.date.today() - datetime.timedelta(days=1)).isoformat(),
+            "value": (run_date() - datetime.timedelta(days=1)).isoformat(),
         }
     )
 
-    async for page in get_all_accounts(session, churns, ["Account ID"]):
-        if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-            accts = page["searchResults"]
-        else:
-            break
-
-        churns = [a["Account ID"] for a in accts]
+    async with asyncio.TaskGroup() as tg:
+        churn_ids = tg.create_task(get_account_ids(session, churns))
+        join_ids = tg.create_task(get_account_ids(session, joins))
 
-    member_signups = []
+    # Only count joins that are not a renewal of a membership that just expired
+    semaphore = asyncio.Semaphore(SIGNUP_VERIFY_CONCURRENCY)
 
-    async for page in get_all_accounts(session, joins, ["Account ID"]):
-        if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-            accts = page["searchResults"]
-        else:
-            break
-
-        for acct in accts:
-            memberships = await get_acct_membership_data(session, acct["Account ID"])
-
-            if len(memberships) == 1:
-                member_signups.append(acct["Account ID"])
-                continue
+    async with asyncio.TaskGroup() as tg:
+        is_signup = {
+            neon_id: tg.create_task(is_member_signup(session, neon_id, semaphore))
+            for neon_id in join_ids.result()
+        }
 
-            if memberships[-1].start_date - memberships[
-                -2
-            ].end_date > datetime.timedelta(days=1):
-                member_signups.append(acct["Account ID"])
+    member_signups = [neon_id for neon_id, task in is_signup.items() if task.result()]
 
-    return (churns, member_signups)
+    return (churn_ids.result(), member_signups)
 
 
 async def get_daily_count() -> tuple[dict[str, int], tuple[list[str], list[str]]]:
-    async with aiohttp.ClientSession(headers=N_HEADERS, base_url=N_BASE_URL) as session:
+    async with create_neon_session() as session:
 
         async with asyncio.TaskGroup() as tg:
             active_members_count = tg.create_task(get_active_members_count(session))
@@ -209,7 +222,7 @@ def update_membership_table(
 
     with Session(sql_engine) as session:
 
-        new_counts["date"] = datetime.date.today() - datetime.timedelta(days=1)
+        new_counts["date"] = run_date() - datetime.timedelta(days=1)
 
         stmt = pg_upsert(MembershipCount).values(new_counts)
 
@@ -265,10 +278,12 @@ def main() -> None:
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    logging.info("Beginning daily membership updates for %s", datetime.date.today())
+    logging.info("Beginning daily membership updates for %s", run_date())
 
     daily_count, daily_churns_and_signups = asyncio.run(get_daily_count())
 
+    log_endpoint_stats()
+
     update_membership_table(engine, daily_count)
 
     update_member_table(
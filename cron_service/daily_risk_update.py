@@ -5,29 +5,44 @@ import datetime
 import logging
 import os
 import re
+from dataclasses import dataclass
+from typing import Any
 import aiohttp
 import requests
 import googlemaps
+import numpy as np
 import pandas as pd
 
-from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert as pg_upsert
-
 from sklearn.pipeline import Pipeline
 from sksurv.ensemble import GradientBoostingSurvivalAnalysis
 
-from helpers.neon_creds import N_HEADERS, N_BASE_URL, is_docker
+from helpers.neon_creds import is_docker
 from helpers.get_neon_data import (
     get_all_accounts,
     get_individual_account,
+    get_account_detail_output_fields,
+    get_searched_account,
+    stored_events,
 )
 from helpers.enums import Attended, AccountCurrentMembershipStatus
 from helpers.neon_dataclasses import NeonAccount
 from helpers.default_dataframe import default_params
 from helpers.survival_model import transform_pipeline, survival_model
+from helpers.neon_client import create_neon_session, log_endpoint_stats
+from helpers.neon_cassette import run_date
+from helpers.member_writer import BulkMemberWriter
+from helpers.location_cache import DriveTimeCache, get_cached_geocode
+from helpers.zip_counts import refresh_member_zip_counts
+from helpers.registration_index import RegistrationIndex
+from helpers.account_history import AccountHistory
+from helpers.change_detection import (
+    LAST_MODIFIED_FIELD,
+    StoredMemberState,
+    load_member_states,
+    fingerprint_features,
+)
 
 from engine import engine
-from schema import Member
 
 if not is_docker():
     from dotenv import load_dotenv
@@ -36,63 +51,195 @@ if not is_docker():
 
 GOOGLE_MAPS_API_KEY = os.environ["GOOGLE_MAPS_API_KEY"]
 
+# Number of accounts fetched, scored and persisted at the same time
+RISK_UPDATE_CONCURRENCY = int(os.environ.get("RISK_UPDATE_CONCURRENCY", 10))
+# Number of accounts scored together in a single model call
+RISK_SCORING_BATCH_SIZE = int(os.environ.get("RISK_SCORING_BATCH_SIZE", 200))
+# Number of scored members upserted per database transaction
+MEMBER_WRITE_BATCH_SIZE = int(os.environ.get("MEMBER_WRITE_BATCH_SIZE", 500))
+# Days a cached Google Maps drive time or geocode is trusted before it is looked up again
+DRIVE_TIME_CACHE_TTL_DAYS = int(os.environ.get("DRIVE_TIME_CACHE_TTL_DAYS", 180))
+# Rescore every member regardless of change detection on this weekday (Monday is 0)
+RISK_FULL_REFRESH_WEEKDAY = int(os.environ.get("RISK_FULL_REFRESH_WEEKDAY", 6))
+RISK_FULL_REFRESH = os.environ.get("RISK_FULL_REFRESH", "false").lower() == "true"
+# The bulk paths below read Neon's search output, whose custom field names, multi-value
+# separator and membership term values have only been checked against the fake Neon
+# server. They stay off until checked against a cassette recorded from the live API.
+# Read contact details and custom fields from the account search instead of fetching
+# every account on its own
+RISK_BULK_ACCOUNT_SEARCH = (
+    os.environ.get("RISK_BULK_ACCOUNT_SEARCH", "false").lower() == "true"
+)
+# Read event registrations by walking events once instead of requesting them per member
+RISK_EVENT_SYNC = os.environ.get("RISK_EVENT_SYNC", "false").lower() == "true"
+# Read memberships and donations through Neon's search endpoints instead of per member
+RISK_HISTORY_SYNC = os.environ.get("RISK_HISTORY_SYNC", "false").lower() == "true"
+PROGRESS_INTERVAL = 50
+
+ASMBLY_ADDRESS = "9701 Dessau Rd Ste 304, Austin, TX 78754"
+
+
+class Progress:
+    """Running count of processed accounts, logged every PROGRESS_INTERVAL accounts."""
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.unchanged = 0
+
+    def advance(self, failed: bool = False, unchanged: bool = False) -> None:
+        self.done += 1
+        if failed:
+            self.failed += 1
+        if unchanged:
+            self.unchanged += 1
+
+        if self.done % PROGRESS_INTERVAL == 0 or self.done == self.total:
+            logging.info(
+                "Processed %d of %d accounts (%d unchanged, %d failed)",
+                self.done,
+                self.total,
+                self.unchanged,
+                self.failed,
+            )
+
 
 def find_member_risk(
     df: pd.DataFrame, pipeline: Pipeline, model: GradientBoostingSurvivalAnalysis
-) -> float:
+) -> np.ndarray:
+    """Score every row of df with a single pipeline transform and model predict."""
     X = df.drop(columns=["membership_cancelled", "duration"])
 
     X_transformed = pipeline.transform(X)
     risk = model.predict(X_transformed)
 
-    return risk[0]
+    return risk
 
 
-def update_member_df(
-    df: pd.DataFrame, acct: NeonAccount, gmaps: googlemaps.Client, asmbly_geocode: str
-) -> pd.DataFrame:
+def get_member_features(
+    acct: NeonAccount,
+    gmaps: googlemaps.Client,
+    asmbly_geocode: str,
+    drive_times: DriveTimeCache,
+) -> dict[str, Any]:
+    """Build the model input row for an account, keyed by the default_params columns."""
     attended = acct.event_info.has_taken_classes()
-    distances = acct.location_info.get_distance_from_asmbly(gmaps, asmbly_geocode)
-
-    df["neon_id"] = acct.basic_info.neon_id
-    df["email"] = acct.basic_info.email
-    df["first_name"] = acct.basic_info.first_name
-    df["last_name"] = acct.basic_info.last_name
-    df["has_op_id"] = acct.basic_info.openpath_id is not None
-    df["has_discourse_id"] = acct.basic_info.discourse_id is not None
-    df["age"] = acct.basic_info.age
-    df["gender"] = acct.basic_info.gender
-    df["referral_source"] = acct.basic_info.referral_source
-    df["family_membership"] = acct.membership_info.family_membership
-    df["waiver_signed"] = acct.basic_info.waiver_date is not None
-    df["orientation_attended"] = acct.basic_info.orientation_date is not None
-    df["taken_MSS"] = attended[Attended.MSS]
-    df["taken_WSS"] = attended[Attended.WSS]
-    df["taken_cnc_class"] = attended[Attended.CNC]
-    df["taken_lasers_class"] = attended[Attended.LASERS]
-    df["taken_3dp_class"] = attended[Attended.PRINTING_3D]
-    df["teacher"] = acct.basic_info.teacher
-    df["steward"] = acct.basic_info.steward
-    df["num_classes_before_joining"] = acct.get_classes_before_first_membership()
-    df["num_classes_attended"] = acct.event_info.total_classes_attended
-    df["total_dollars_spent"] = acct.total_dollars_spent()
-    df["time_from_asmbly"] = distances["time"]
+    distances = acct.location_info.get_distance_from_asmbly(
+        gmaps, asmbly_geocode, drive_times
+    )
 
     cancelled = (
         acct.membership_info.current_membership_status
         == AccountCurrentMembershipStatus.INACTIVE
     )
 
-    df["membership_cancelled"] = cancelled
-    df["annual_membership"] = acct.membership_info.has_annual_membership
-    df["duration"] = acct.membership_info.membership_duration
-
-    return df
-
-
-def update_member_in_db(acct: NeonAccount, df: pd.DataFrame) -> None:
-
-    churn_risk = find_member_risk(df, transform_pipeline, survival_model)
+    return {
+        "neon_id": acct.basic_info.neon_id,
+        "email": acct.basic_info.email,
+        "first_name": acct.basic_info.first_name,
+        "last_name": acct.basic_info.last_name,
+        "has_op_id": acct.basic_info.openpath_id is not None,
+        "has_discourse_id": acct.basic_info.discourse_id is not None,
+        "time_from_asmbly": distances["time"],
+        "age": acct.basic_info.age,
+        "gender": acct.basic_info.gender,
+        "referral_source": acct.basic_info.referral_source,
+        "family_membership": acct.membership_info.family_membership,
+        "membership_cancelled": cancelled,
+        "annual_membership": acct.membership_info.has_annual_membership,
+        "waiver_signed": acct.basic_info.waiver_date is not None,
+        "orientation_attended": acct.basic_info.orientation_date is not None,
+        "taken_MSS": attended[Attended.MSS],
+        "taken_WSS": attended[Attended.WSS],
+        "taken_cnc_class": attended[Attended.CNC],
+        "taken_lasers_class": attended[Attended.LASERS],
+        "taken_3dp_class": attended[Attended.PRINTING_3D],
+        "teacher": acct.basic_info.teacher,
+        "steward": acct.basic_info.steward,
+        "num_classes_before_joining": acct.get_classes_before_first_membership(),
+        "num_classes_attended": acct.event_info.total_classes_attended,
+        "total_dollars_spent": acct.total_dollars_spent(),
+        "duration": acct.membership_info.membership_duration,
+    }
+
+
+class BatchScorer:
+    """
+    Collect feature rows for many accounts and score them together, so the transform
+    pipeline and survival model run once per batch instead of once per account.
+
+    If a batch fails to score, its accounts are scored one at a time so only the ones
+    that fail on their own are dropped, each logged and counted in failed.
+    """
+
+    def __init__(self, batch_size: int, writer: BulkMemberWriter):
+        self.batch_size = batch_size
+        self.writer = writer
+        self.failed = 0
+        self._accts: list[NeonAccount] = []
+        self._rows: list[dict[str, Any]] = []
+        self._change_state: list[dict[str, Any]] = []
+
+    async def add(
+        self,
+        acct: NeonAccount,
+        features: dict[str, Any],
+        change_state: dict[str, Any],
+    ) -> None:
+        self._accts.append(acct)
+        self._rows.append(features)
+        self._change_state.append(change_state)
+
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Score all pending rows and pass the results to the member writer."""
+        if not self._rows:
+            return
+
+        accts, rows, change_state = self._accts, self._rows, self._change_state
+        self._accts, self._rows, self._change_state = [], [], []
+
+        df = pd.DataFrame.from_records(rows, columns=default_params.columns)
+        # Scoring is CPU bound, keep it off the event loop
+        try:
+            risks = await asyncio.to_thread(
+                find_member_risk, df, transform_pipeline, survival_model
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.exception(
+                "Failed to score a batch of %d accounts, scoring them one at a time",
+                len(rows),
+            )
+            risks = await asyncio.to_thread(self._score_each, df)
+
+        for acct, churn_risk, state in zip(accts, risks, change_state):
+            if churn_risk is None:
+                continue
+            await self.writer.add(get_member_row(acct, float(churn_risk)) | state)
+
+    def _score_each(self, df: pd.DataFrame) -> list[float | None]:
+        """Score every row on its own, None for the rows that fail."""
+        risks = []
+
+        for i in range(len(df)):
+            row = df.iloc[[i]]
+            try:
+                risk = find_member_risk(row, transform_pipeline, survival_model)[0]
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.failed += 1
+                risk = None
+                logging.exception("Failed to score account %s", row["neon_id"].iloc[0])
+
+            risks.append(risk)
+
+        return risks
+
+
+def get_member_row(acct: NeonAccount, churn_risk: float) -> dict[str, Any]:
+    """Build the member table row for a scored account."""
 
     pattern = re.compile(r"^(\d+)(?:-|$)")
 
@@ -104,33 +251,108 @@ def update_member_in_db(acct: NeonAccount, df: pd.DataFrame) -> None:
     if zip_code:
         zip_code = int(zip_code.group(1))
 
-    with Session(engine) as sql_session:
-        stmt = pg_upsert(Member).values(
-            zip_code=zip_code,
-            membership_duration=acct.membership_info.membership_duration,
-            risk_score=churn_risk,
-            neon_id=int(acct.basic_info.neon_id),
-            first_name=acct.basic_info.first_name,
-            last_name=acct.basic_info.last_name,
-            email=acct.basic_info.email,
-            active=acct.membership_info.current_membership_status
-            == AccountCurrentMembershipStatus.ACTIVE,
+    return {
+        "zip_code": zip_code,
+        "membership_duration": acct.membership_info.membership_duration,
+        "risk_score": churn_risk,
+        "neon_id": int(acct.basic_info.neon_id),
+        "first_name": acct.basic_info.first_name,
+        "last_name": acct.basic_info.last_name,
+        "email": acct.basic_info.email,
+        "active": acct.membership_info.current_membership_status
+        == AccountCurrentMembershipStatus.ACTIVE,
+    }
+
+
+@dataclass
+class RiskUpdateContext:
+    """Shared state for the account workers of a single risk update run."""
+
+    session: aiohttp.ClientSession
+    progress: Progress
+    scorer: BatchScorer
+    writer: BulkMemberWriter
+    gmaps: googlemaps.Client
+    asmbly_geocode: dict[str, float]
+    drive_times: DriveTimeCache
+    stored_states: dict[int, StoredMemberState]
+    full_refresh: bool
+    bulk_search: bool
+    registrations: RegistrationIndex | None
+    history: AccountHistory | None
+
+
+async def update_account(ctx: RiskUpdateContext, search_result: dict) -> bool:
+    """
+    Fetch an account and queue it for scoring, unless its model inputs have not changed
+    since it was last scored. Returns whether the account was unchanged.
+    """
+    if ctx.bulk_search:
+        acct = await get_searched_account(
+            ctx.session, search_result, ctx.registrations, ctx.history
         )
-
-        stmt = stmt.on_conflict_do_update(
-            index_elements=[Member.neon_id],
-            set_={
-                Member.zip_code: stmt.excluded.zip_code,
-                Member.membership_duration: stmt.excluded.membership_duration,
-                Member.risk_score: stmt.excluded.risk_score,
-                Member.active: stmt.excluded.active,
-                Member.first_name: stmt.excluded.first_name,
-                Member.last_name: stmt.excluded.last_name,
-                Member.email: stmt.excluded.email,
-            },
+    else:
+        acct = await get_individual_account(
+            ctx.session,
+            search_result["Account ID"],
+            search_result["Account Current Membership Status"],
+            ctx.registrations,
+            ctx.history,
         )
-        sql_session.execute(stmt)
-        sql_session.commit()
+
+    # The Google Maps client is synchronous, keep it off the event loop
+    features = await asyncio.to_thread(
+        get_member_features, acct, ctx.gmaps, ctx.asmbly_geocode, ctx.drive_times
+    )
+
+    change_state = {
+        "neon_last_modified": search_result.get(LAST_MODIFIED_FIELD),
+        "input_fingerprint": fingerprint_features(features),
+    }
+
+    stored = ctx.stored_states.get(int(acct.basic_info.neon_id))
+    if (
+        not ctx.full_refresh
+        and stored is not None
+        and stored.risk_score is not None
+        and stored.input_fingerprint == change_state["input_fingerprint"]
+    ):
+        await ctx.writer.add(get_member_row(acct, stored.risk_score) | change_state)
+        return True
+
+    await ctx.scorer.add(acct, features, change_state)
+    return False
+
+
+async def account_worker(ctx: RiskUpdateContext, queue: asyncio.Queue[dict]) -> None:
+    """Process accounts from the queue until cancelled."""
+    while True:
+        search_result = await queue.get()
+        failed, unchanged = False, False
+        try:
+            unchanged = await update_account(ctx, search_result)
+        except Exception:  # pylint: disable=broad-exception-caught
+            failed = True
+            logging.exception(
+                "Failed to update risk for account %s", search_result["Account ID"]
+            )
+        finally:
+            ctx.progress.advance(failed, unchanged)
+            queue.task_done()
+
+
+def is_unmodified(
+    search_result: dict, stored_states: dict[int, StoredMemberState]
+) -> bool:
+    """Check whether Neon reports no edits to the account since it was last scored."""
+    stored = stored_states.get(int(search_result["Account ID"]))
+
+    return (
+        stored is not None
+        and stored.risk_score is not None
+        and stored.neon_last_modified is not None
+        and stored.neon_last_modified == search_result.get(LAST_MODIFIED_FIELD)
+    )
 
 
 async def main() -> None:
@@ -140,15 +362,28 @@ async def main() -> None:
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    logging.info("Beginning daily member risk updates for %s", datetime.date.today())
+    logging.info("Beginning daily member risk updates for %s", run_date())
 
     requests_session = requests.Session()
     gmaps = googlemaps.Client(
         key=GOOGLE_MAPS_API_KEY, requests_session=requests_session
     )
-    asmbly_geocode = gmaps.geocode("9701 Dessau Rd Ste 304, Austin, TX 78754")[0][
-        "geometry"
-    ]["location"]
+    asmbly_geocode = get_cached_geocode(
+        engine,
+        gmaps,
+        ASMBLY_ADDRESS,
+        datetime.timedelta(days=DRIVE_TIME_CACHE_TTL_DAYS),
+    )
+
+    drive_times = DriveTimeCache(
+        engine, datetime.timedelta(days=DRIVE_TIME_CACHE_TTL_DAYS)
+    )
+    drive_times.load()
+    stored_events.load(engine)
+
+    registration_index = RegistrationIndex() if RISK_EVENT_SYNC else None
+    if registration_index is not None:
+        registration_index.load(engine, stored_events)
 
     search_params = [
         {
@@ -184,36 +419,109 @@ async def main() -> None:
         {
             "field": "First Membership Enrollment Date",
             "operator": "LESS_THAN",
-            "value": (datetime.date.today() - datetime.timedelta(days=14)).isoformat(),
+            "value": (run_date() - datetime.timedelta(days=14)).isoformat(),
         },
     ]
 
-    output_fields = ["Account ID", "Account Current Membership Status"]
+    output_fields = [
+        "Account ID",
+        "Account Current Membership Status",
+        LAST_MODIFIED_FIELD,
+    ]
 
-    async with aiohttp.ClientSession(headers=N_HEADERS, base_url=N_BASE_URL) as session:
+    full_refresh = (
+        RISK_FULL_REFRESH or run_date().weekday() == RISK_FULL_REFRESH_WEEKDAY
+    )
+    stored_states = load_member_states(engine)
+    logging.info(
+        "Running %s risk update, %d members on record",
+        "full" if full_refresh else "incremental",
+        len(stored_states),
+    )
+
+    queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=RISK_UPDATE_CONCURRENCY * 2)
+    progress = Progress()
+    writer = BulkMemberWriter(engine, MEMBER_WRITE_BATCH_SIZE)
+    scorer = BatchScorer(RISK_SCORING_BATCH_SIZE, writer)
+
+    async with create_neon_session() as session:
+
+        history = AccountHistory() if RISK_HISTORY_SYNC else None
+
+        async with asyncio.TaskGroup() as tg:
+            if registration_index is not None:
+                tg.create_task(registration_index.sync(session, stored_events))
+            if history is not None:
+                tg.create_task(history.sync_memberships(session))
+                tg.create_task(history.sync_donations(session))
+
+        registrations = registration_index
+        if registration_index is not None and not registration_index.complete:
+            # Members of a failed event would be scored with classes missing
+            logging.warning(
+                "%d events failed to sync, reading registrations per account instead",
+                registration_index.failed_events,
+            )
+            registrations = None
+
+        ctx = RiskUpdateContext(
+            session=session,
+            progress=progress,
+            scorer=scorer,
+            writer=writer,
+            gmaps=gmaps,
+            asmbly_geocode=asmbly_geocode,
+            drive_times=drive_times,
+            stored_states=stored_states,
+            full_refresh=full_refresh,
+            bulk_search=RISK_BULK_ACCOUNT_SEARCH,
+            registrations=registrations,
+            history=history,
+        )
+
+        if RISK_BULK_ACCOUNT_SEARCH:
+            output_fields += await get_account_detail_output_fields(session)
+
+        workers = [
+            asyncio.create_task(account_worker(ctx, queue))
+            for _ in range(RISK_UPDATE_CONCURRENCY)
+        ]
 
-        count = 0
         async for page in get_all_accounts(session, search_params, output_fields):
-            if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-                accts = page["searchResults"]
-            else:
-                break
+            accts = page["searchResults"]
+            progress.total = page["pagination"]["totalResults"]
 
             for i in accts:
-                member_df = default_params.copy(deep=True)
+                if not full_refresh and is_unmodified(i, stored_states):
+                    progress.advance(unchanged=True)
+                    continue
+
+                await queue.put(i)
 
-                acct = await get_individual_account(
-                    session, i["Account ID"], i["Account Current Membership Status"]
-                )
+        await queue.join()
 
-                member_df = update_member_df(member_df, acct, gmaps, asmbly_geocode)
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
 
-                update_member_in_db(acct, member_df)
+    await scorer.flush()
+    await writer.flush()
+    drive_times.flush()
+    stored_events.save(engine)
+    if registration_index is not None:
+        registration_index.save(engine)
+    refresh_member_zip_counts(engine)
 
-                count += 1
+    logging.info(
+        "Drive time cache: %d hits, %d misses", drive_times.hits, drive_times.misses
+    )
+    log_endpoint_stats()
 
-                if count % 50 == 0:
-                    print(f"--- {count} ---")
+    logging.info(
+        "Finished risk updates: %d accounts processed, %d failed",
+        progress.done,
+        progress.failed + scorer.failed + writer.failed,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,262 @@
+# pylint: disable=import-error
+
+import asyncio
+import datetime
+import itertools
+import logging
+import os
+
+import aiohttp
+import polars as pl
+
+from helpers.get_neon_data import search_all
+from helpers.neon_cassette import run_date
+from helpers.enums import NeonMembershipStatus, NeonMembershipType
+from helpers.neon_dataclasses import Donation, NeonMembership
+
+# Earliest membership start and donation date synced, all history when unset
+HISTORY_SYNC_START_DATE = (
+    datetime.date.fromisoformat(os.environ["HISTORY_SYNC_START_DATE"])
+    if os.environ.get("HISTORY_SYNC_START_DATE")
+    else None
+)
+# With no start date, history from this date on is split into windows and everything
+# earlier is read by a single search
+HISTORY_SYNC_WINDOWS_FROM = datetime.date.fromisoformat(
+    os.environ.get("HISTORY_SYNC_WINDOWS_FROM", "2018-01-01")
+)
+# Days of history covered by each search, searches for different windows run concurrently
+HISTORY_SYNC_WINDOW_DAYS = int(os.environ.get("HISTORY_SYNC_WINDOW_DAYS", 365))
+# Searches made at the same time while syncing
+HISTORY_SYNC_CONCURRENCY = int(os.environ.get("HISTORY_SYNC_CONCURRENCY", 4))
+
+MEMBERSHIP_OUTPUT_FIELDS = [
+    "Account ID",
+    "Membership Start Date",
+    "Membership Expiration Date",
+    "Membership Cost",
+    "Membership Term Unit",
+]
+DONATION_OUTPUT_FIELDS = ["Account ID", "Donation Date", "Donation Amount"]
+
+MEMBERSHIP_SCHEMA = {
+    "neon_id": pl.Int64,
+    "start_date": pl.Date,
+    "end_date": pl.Date,
+    "fee": pl.Float64,
+    "term_unit": pl.Utf8,
+}
+DONATION_SCHEMA = {"neon_id": pl.Int64, "date": pl.Date, "amount": pl.Float64}
+
+
+def date_windows(
+    field: str,
+    start_date: datetime.date | None,
+    days: int,
+    windows_from: datetime.date = HISTORY_SYNC_WINDOWS_FROM,
+) -> list[list[dict]]:
+    """
+    Search fields splitting everything on or after start_date into windows of the given
+    number of days. The last window is open ended so future dates are included.
+
+    With no start_date, the windows begin at windows_from and a first open ended window
+    covers everything before it.
+    """
+    today = run_date()
+    starts = [start_date or windows_from]
+    while starts[-1] + datetime.timedelta(days=days) <= today:
+        starts.append(starts[-1] + datetime.timedelta(days=days))
+
+    windows = []
+    for start, end in itertools.zip_longest(starts, starts[1:]):
+        window = [
+            {
+                "field": field,
+                "operator": "GREATER_AND_EQUAL",
+                "value": start.isoformat(),
+            }
+        ]
+        if end is not None:
+            window.append(
+                {"field": field, "operator": "LESS_THAN", "value": end.isoformat()}
+            )
+        windows.append(window)
+
+    if start_date is None:
+        windows.insert(
+            0,
+            [{"field": field, "operator": "LESS_THAN", "value": starts[0].isoformat()}],
+        )
+
+    return windows
+
+
+async def search_rows(
+    aio_session: aiohttp.ClientSession,
+    resource_path: str,
+    searches: list[list[dict]],
+    output_fields: list[str],
+) -> list[dict]:
+    """Run several searches of an endpoint concurrently and combine their results."""
+    semaphore = asyncio.Semaphore(HISTORY_SYNC_CONCURRENCY)
+
+    async def search(search_fields: list[dict]) -> list[dict]:
+        rows = []
+        async with semaphore:
+            async for page in search_all(
+                aio_session, resource_path, search_fields, output_fields
+            ):
+                rows.extend(page["searchResults"])
+        return rows
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(search(search_fields)) for search_fields in searches]
+
+    return list(itertools.chain.from_iterable(task.result() for task in tasks))
+
+
+def index_by_account(frame: pl.DataFrame) -> dict[int, tuple[int, int]]:
+    """Offset and length of each account's rows in a frame sorted by neon_id."""
+    bounds = (
+        frame.with_row_index("row")
+        .group_by("neon_id")
+        .agg(pl.col("row").first().alias("offset"), pl.len().alias("length"))
+    )
+
+    return {neon_id: (offset, length) for neon_id, offset, length in bounds.iter_rows()}
+
+
+class AccountHistory:
+    """
+    Successful memberships and donations of many accounts, in polars frames keyed by
+    account ID.
+
+    Synced through Neon's search endpoints, a few dozen pages in place of a membership
+    and a donation request per account. Accounts with no rows have no history.
+    """
+
+    def __init__(self):
+        self.memberships = pl.DataFrame(schema=MEMBERSHIP_SCHEMA)
+        self.donations = pl.DataFrame(schema=DONATION_SCHEMA)
+        self._membership_rows: dict[int, tuple[int, int]] = {}
+        self._donation_rows: dict[int, tuple[int, int]] = {}
+
+    async def sync_memberships(self, aio_session: aiohttp.ClientSession) -> None:
+        """
+        Read every successful membership starting since HISTORY_SYNC_START_DATE, or
+        every one there is when it is unset.
+        """
+        base = [
+            {
+                "field": "Membership Transaction Status",
+                "operator": "EQUAL",
+                "value": "Succeeded",
+            },
+            {
+                "field": "Most Recent Membership Only",
+                "operator": "EQUAL",
+                "value": "No",
+            },
+        ]
+
+        searches = date_windows(
+            "Membership Start Date", HISTORY_SYNC_START_DATE, HISTORY_SYNC_WINDOW_DAYS
+        )
+
+        rows = await search_rows(
+            aio_session,
+            "/v2/accounts/search",
+            [base + search_fields for search_fields in searches],
+            MEMBERSHIP_OUTPUT_FIELDS,
+        )
+
+        self.memberships = (
+            pl.DataFrame(
+                {
+                    "neon_id": [r["Account ID"] for r in rows],
+                    "start_date": [r["Membership Start Date"] for r in rows],
+                    "end_date": [r["Membership Expiration Date"] for r in rows],
+                    "fee": [r["Membership Cost"] for r in rows],
+                    "term_unit": [r["Membership Term Unit"] for r in rows],
+                },
+                schema={name: pl.Utf8 for name in MEMBERSHIP_SCHEMA},
+            )
+            .with_columns(
+                pl.col("neon_id").cast(pl.Int64),
+                pl.col("start_date", "end_date").str.to_date("%Y-%m-%d"),
+                pl.col("fee").cast(pl.Float64),
+                pl.col("term_unit").str.to_uppercase(),
+            )
+            .sort("neon_id", "start_date")
+        )
+        self._membership_rows = index_by_account(self.memberships)
+
+        logging.info(
+            "Synced %d memberships of %d accounts",
+            len(self.memberships),
+            len(self._membership_rows),
+        )
+
+    async def sync_donations(self, aio_session: aiohttp.ClientSession) -> None:
+        """
+        Read every donation made since HISTORY_SYNC_START_DATE, or every one there is
+        when it is unset.
+        """
+        rows = await search_rows(
+            aio_session,
+            "/v2/donations/search",
+            date_windows(
+                "Donation Date", HISTORY_SYNC_START_DATE, HISTORY_SYNC_WINDOW_DAYS
+            ),
+            DONATION_OUTPUT_FIELDS,
+        )
+
+        self.donations = (
+            pl.DataFrame(
+                {
+                    "neon_id": [r["Account ID"] for r in rows],
+                    "date": [r["Donation Date"] for r in rows],
+                    "amount": [r["Donation Amount"] for r in rows],
+                },
+                schema={name: pl.Utf8 for name in DONATION_SCHEMA},
+            )
+            .with_columns(
+                pl.col("neon_id").cast(pl.Int64),
+                pl.col("date").str.to_date("%Y-%m-%d"),
+                pl.col("amount").cast(pl.Float64),
+            )
+            .sort("neon_id", "date")
+        )
+        self._donation_rows = index_by_account(self.donations)
+
+        logging.info(
+            "Synced %d donations of %d accounts",
+            len(self.donations),
+            len(self._donation_rows),
+        )
+
+    def get_memberships(self, neon_id: int | str) -> list[NeonMembership]:
+        """The successful memberships of an account, oldest first."""
+        if (rows := self._membership_rows.get(int(neon_id))) is None:
+            return []
+
+        return [
+            NeonMembership(
+                price=row["fee"],
+                start_date=row["start_date"],
+                end_date=row["end_date"],
+                type=NeonMembershipType(row["term_unit"]),
+                status=NeonMembershipStatus.SUCCEEDED,
+            )
+            for row in self.memberships.slice(*rows).iter_rows(named=True)
+        ]
+
+    def get_donations(self, neon_id: int | str) -> list[Donation]:
+        """The donations of an account, oldest first."""
+        if (rows := self._donation_rows.get(int(neon_id))) is None:
+            return []
+
+        return [
+            Donation(date=row["date"], amount=row["amount"])
+            for row in self.donations.slice(*rows).iter_rows(named=True)
+        ]
@@ -1,13 +1,20 @@
-def backoff_time(retry_count: int) -> float:
+import random
+
+
+def backoff_time(retry_count: int, jitter: bool = False) -> float:
     """
     Calculates the backoff time for retrying an operation. The backoff time increases exponentially.
 
     Parameters:
         retry_count (int): The number of times the operation has been retried.
+        jitter (bool): Pick a random time up to the exponential backoff time, so that many
+        clients throttled at the same moment do not all retry at the same moment.
 
     Returns:
         wait_time (float): The calculated backoff time in seconds.
     """
     initial_delay = 200 / 1000
     wait_time = (2**retry_count) * initial_delay
+    if jitter:
+        wait_time = random.uniform(initial_delay, wait_time)
     return wait_time
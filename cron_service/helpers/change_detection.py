@@ -0,0 +1,51 @@
+# pylint: disable=import-error
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from schema import Member
+
+# Neon account search output field holding the time the account was last edited
+LAST_MODIFIED_FIELD = "Account Last Modified Date/Time"
+
+
+@dataclass
+class StoredMemberState:
+    neon_last_modified: str | None
+    input_fingerprint: str | None
+    risk_score: float | None
+
+
+def load_member_states(sql_engine: sqlalchemy.Engine) -> dict[int, StoredMemberState]:
+    """Read the change detection state of every member from the database."""
+    stmt = select(
+        Member.neon_id,
+        Member.neon_last_modified,
+        Member.input_fingerprint,
+        Member.risk_score,
+    )
+
+    with Session(sql_engine) as session:
+        return {
+            row.neon_id: StoredMemberState(
+                neon_last_modified=row.neon_last_modified,
+                input_fingerprint=row.input_fingerprint,
+                risk_score=row.risk_score,
+            )
+            for row in session.execute(stmt)
+        }
+
+
+def fingerprint_features(features: dict[str, Any]) -> str:
+    """
+    Hash the model input row of an account. Two accounts with the same fingerprint get
+    the same risk score, so an unchanged fingerprint means the account need not be scored.
+    """
+    encoded = json.dumps(features, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
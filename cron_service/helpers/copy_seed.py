@@ -0,0 +1,153 @@
+# pylint: disable=import-error
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import polars as pl
+import sqlalchemy
+
+SEED_BATCH_SIZE = int(os.environ.get("SEED_BATCH_SIZE", 50_000))
+SEED_CHECKPOINT_DIR = os.environ.get("SEED_CHECKPOINT_DIR", "./data")
+
+
+def csv_batches(
+    file_path: str | Path, batch_size: int = SEED_BATCH_SIZE
+) -> Iterator[pl.DataFrame]:
+    """Read a CSV file batch_size rows at a time."""
+    reader = pl.read_csv_batched(file_path, batch_size=batch_size)
+
+    while batches := reader.next_batches(1):
+        yield batches[0]
+
+
+def source_id(*file_paths: str | Path) -> str:
+    """Identify the input files, so a checkpoint is discarded when they change."""
+    return ";".join(
+        f"{Path(p).resolve()}:{os.stat(p).st_size}:{os.stat(p).st_mtime_ns}"
+        for p in file_paths
+    )
+
+
+class SeedCheckpoint:
+    """
+    Number of batches of a seed that have been committed, stored in a JSON file so an
+    interrupted seed resumes after the last committed batch.
+    """
+
+    def __init__(self, table_name: str, source: str):
+        self.path = Path(SEED_CHECKPOINT_DIR).joinpath(
+            f".{table_name}.seed_checkpoint.json"
+        )
+        self.source = source
+        self.batches = 0
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if state.get("source") == source:
+            self.batches = state["batches"]
+
+    def save(self, batches: int) -> None:
+        self.batches = batches
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "batches": batches}, f)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def copy_upsert(
+    conn: sqlalchemy.Connection,
+    table: sqlalchemy.Table,
+    frame: pl.DataFrame,
+    conflict_columns: list[str],
+) -> None:
+    """
+    COPY a frame into a temporary staging table and merge it into table, updating every
+    column of rows that already exist. Rows repeating a key within the frame keep the
+    last occurrence, since one INSERT cannot update the same row twice.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+
+    frame = frame.unique(subset=conflict_columns, keep="last", maintain_order=True)
+
+    columns = ", ".join(quote(c) for c in frame.columns)
+    updates = ", ".join(
+        f"{quote(c)} = EXCLUDED.{quote(c)}"
+        for c in frame.columns
+        if c not in conflict_columns
+    )
+    staging = quote(f"{table.name}_staging")
+
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {quote(table.name)} WITH NO DATA"
+    )
+
+    buffer = frame.write_csv(include_header=False, null_value="")
+
+    cursor = conn.connection.cursor()
+    with cursor.copy(
+        f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    ) as copy:
+        copy.write(buffer)
+
+    conn.exec_driver_sql(
+        f"INSERT INTO {quote(table.name)} ({columns}) SELECT {columns} FROM {staging} "
+        f"ON CONFLICT ({', '.join(quote(c) for c in conflict_columns)}) "
+        f"DO UPDATE SET {updates}"
+    )
+
+
+def seed_table(
+    sql_engine: sqlalchemy.Engine,
+    table: sqlalchemy.Table,
+    batches: Iterable[pl.DataFrame],
+    conflict_columns: list[str],
+    source: str,
+) -> None:
+    """
+    Upsert batches into table, one transaction per batch, skipping the batches an earlier
+    run of the same seed with the same source already committed.
+    """
+    checkpoint = SeedCheckpoint(table.name, source)
+
+    if checkpoint.batches:
+        logging.info(
+            "Resuming %s seed after %d committed batches",
+            table.name,
+            checkpoint.batches,
+        )
+
+    start = time.monotonic()
+    rows = 0
+
+    for i, batch in enumerate(batches):
+        if i < checkpoint.batches:
+            continue
+
+        with sql_engine.begin() as conn:
+            copy_upsert(conn, table, batch, conflict_columns)
+
+        checkpoint.save(i + 1)
+        rows += len(batch)
+
+        logging.info(
+            "Seeded batch %d of %s: %d rows (%.0f rows/s)",
+            i + 1,
+            table.name,
+            rows,
+            rows / (time.monotonic() - start),
+        )
+
+    checkpoint.clear()
+
+    logging.info("Finished seeding %s: %d rows", table.name, rows)
@@ -0,0 +1,147 @@
+# pylint: disable=import-error
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+import sqlalchemy
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_upsert
+
+from helpers.enums import NeonEventCategory
+from helpers.neon_dataclasses import NeonEventType, StoredNeonEvent
+from schema import EventInstance, EventType
+
+
+class EventCatalogue:
+    """
+    Neon events keyed by event ID, persisted in the event_type and event_instance tables.
+
+    Past events do not change, so once an event has been fetched it is never requested from
+    Neon again. Concurrent lookups of the same missing event share a single request.
+    """
+
+    def __init__(self):
+        self._events: dict[int, StoredNeonEvent] = {}
+        self._new: dict[int, StoredNeonEvent] = {}
+        self._in_flight: dict[int, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def load(self, sql_engine: sqlalchemy.Engine) -> None:
+        """Read all stored events from the database."""
+        stmt = select(
+            EventInstance.id,
+            EventInstance.date,
+            EventType.name,
+            EventType.category,
+        ).join(EventInstance.event_type)
+
+        with Session(sql_engine) as session:
+            for row in session.execute(stmt):
+                category = NeonEventCategory(row.category or "None")
+                self._events[row.id] = StoredNeonEvent(
+                    event_name=row.name,
+                    event_date=row.date,
+                    event_type=NeonEventType(name=row.name, category=category),
+                    category=category,
+                )
+
+        logging.info("Loaded %d stored events", len(self._events))
+
+    async def get(
+        self,
+        event_id: int | str,
+        fetch: Callable[[], Awaitable[StoredNeonEvent]],
+    ) -> StoredNeonEvent:
+        """
+        Return the stored event, calling fetch to retrieve it from Neon if it is unknown.
+        """
+        event_id = int(event_id)
+
+        if event := self._events.get(event_id):
+            return event
+
+        if (task := self._in_flight.get(event_id)) is None:
+            task = asyncio.create_task(self._fetch(event_id, fetch))
+            self._in_flight[event_id] = task
+
+        # Shield the shared request so one cancelled caller does not fail the others
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        event_id: int,
+        fetch: Callable[[], Awaitable[StoredNeonEvent]],
+    ) -> StoredNeonEvent:
+        """
+        Fetch an event and store it before the request stops being shared, so no lookup
+        in between can miss both and request it again.
+        """
+        try:
+            event = await fetch()
+            self.add(event_id, event)
+            return event
+        finally:
+            self._in_flight.pop(event_id, None)
+
+    def lookup(self, event_id: int | str) -> StoredNeonEvent | None:
+        """The stored event, without requesting it from Neon if it is unknown."""
+        return self._events.get(int(event_id))
+
+    def add(self, event_id: int | str, event: StoredNeonEvent) -> None:
+        """Store an event retrieved from Neon by some other request."""
+        event_id = int(event_id)
+
+        if event_id not in self._events:
+            self._events[event_id] = event
+            self._new[event_id] = event
+
+    def save(self, sql_engine: sqlalchemy.Engine) -> None:
+        """Write events fetched since the last save to the database."""
+        if not self._new:
+            return
+
+        new, self._new = self._new, {}
+
+        event_types = {
+            event.event_type.name: str(event.category) for event in new.values()
+        }
+
+        with Session(sql_engine) as session:
+            stmt = pg_upsert(EventType).values(
+                [
+                    {"name": name, "category": category}
+                    for name, category in event_types.items()
+                ]
+            )
+            session.execute(
+                stmt.on_conflict_do_nothing(index_elements=[EventType.name])
+            )
+
+            type_ids = dict(
+                session.execute(
+                    select(EventType.name, EventType.id).where(
+                        EventType.name.in_(event_types)
+                    )
+                ).all()
+            )
+
+            stmt = pg_upsert(EventInstance).values(
+                [
+                    {
+                        "id": event_id,
+                        "event_type_id": type_ids[event.event_type.name],
+                        "date": event.event_date,
+                    }
+                    for event_id, event in new.items()
+                ]
+            )
+            session.execute(
+                stmt.on_conflict_do_nothing(index_elements=[EventInstance.id])
+            )
+            session.commit()
+
+        logging.info("Stored %d new events", len(new))
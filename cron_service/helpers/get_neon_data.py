@@ -2,12 +2,17 @@
 
 import datetime
 import asyncio
+import logging
+import os
+from collections import deque
 from pprint import pprint
-from typing import AsyncIterator, AsyncGenerator
+from typing import AsyncIterator, AsyncGenerator, TYPE_CHECKING
 
 import aiohttp
 
-from helpers.api_exponential_backoff import backoff_time
+from helpers.neon_client import neon_request
+from helpers.neon_cassette import run_date
+from helpers.event_catalogue import EventCatalogue
 from helpers.enums import (
     NeonEventCategory,
     NeonEventRegistrationStatus,
@@ -30,11 +35,50 @@ from helpers.neon_dataclasses import (
     BasicAccountInfo,
 )
 
-stored_events: dict[int, StoredNeonEvent] = {}
+if TYPE_CHECKING:
+    from helpers.account_history import AccountHistory
+    from helpers.registration_index import RegistrationIndex
+
+# Account search pages requested concurrently by get_all_accounts
+PAGE_PREFETCH = int(os.environ.get("NEON_PAGE_PREFETCH", 4))
+
+# Account custom fields read by get_individual_account
+ACCOUNT_CUSTOM_FIELDS = [
+    "OpenPathID",
+    "DiscourseID",
+    "Family Group Sub Member",
+    "FamilyGroupPrimaryMember",
+    "WaiverDate",
+    "FacilityTourDate",
+    "Referral Source",
+]
+# Account search output fields with the contact details read by get_individual_account
+ACCOUNT_DETAIL_OUTPUT_FIELDS = [
+    "First Name",
+    "Last Name",
+    "Email 1",
+    "Phone 1 Full Number (F)",
+    "Gender",
+    "DOB Year",
+    "DOB Month",
+    "DOB Day",
+    "Address Line 1",
+    "City",
+    "State/Province",
+    "Zip Code",
+    "Individual Type",
+]
+# Separates the options of multi-value fields in account search results
+SEARCH_VALUE_SEPARATOR = "|"
+
+stored_events = EventCatalogue()
 
 
 async def get_all_accounts(
-    aio_session: aiohttp.ClientSession, search_fields: dict, output_fields: list
+    aio_session: aiohttp.ClientSession,
+    search_fields: dict,
+    output_fields: list,
+    prefetch: int = PAGE_PREFETCH,
 ) -> AsyncIterator[AsyncGenerator[dict, None]]:
     """
     Asynchronously retrieves all Neon accounts from the Neon API matching the search criteria.
@@ -45,35 +89,74 @@ async def get_all_accounts(
         HTTP requests.
         search_fields: A dict of search criteria to filter Neon accounts.
         output_fields: A list of output fields desired.
+        prefetch: The maximum number of pages requested concurrently.
 
     Returns:
         AsyncIterator[AsyncGenerator[dict]]: Async generator of dicts of Neon accounts
         matching the search fields.
     """
-    resource_path = "/v2/accounts/search"
-    max_retries = 10
-    page = 0
+    async for page in search_all(
+        aio_session, "/v2/accounts/search", search_fields, output_fields, prefetch
+    ):
+        yield page
+
+
+async def search_all(
+    aio_session: aiohttp.ClientSession,
+    resource_path: str,
+    search_fields: dict,
+    output_fields: list,
+    prefetch: int = PAGE_PREFETCH,
+) -> AsyncIterator[AsyncGenerator[dict, None]]:
+    """
+    Asynchronously retrieves every page of results of a Neon search endpoint.
 
-    while True:
+    The first page gives the total number of pages, after which up to `prefetch` pages are
+    requested at once. Pages are always yielded in order.
+
+    Parameters:
+        aio_session (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        resource_path: The search endpoint, e.g. /v2/accounts/search.
+        search_fields: A dict of search criteria to filter results.
+        output_fields: A list of output fields desired.
+        prefetch: The maximum number of pages requested concurrently.
 
+    Returns:
+        AsyncIterator[AsyncGenerator[dict]]: Async generator of pages of search results.
+    """
+
+    async def get_page(page: int) -> dict:
         data = {
             "searchFields": search_fields,
             "outputFields": output_fields,
             "pagination": {"currentPage": page, "pageSize": 200},
         }
 
-        for i in range(max_retries):
-            async with aio_session.post(resource_path, json=data) as accounts:
-                if accounts.status == 200:
-                    accounts_json = await accounts.json()
-                    break
-                if accounts.status in set([429, 502]):
-                    await asyncio.sleep(backoff_time(i))
-                else:
-                    print(accounts.status)
+        return await neon_request(aio_session, "POST", resource_path, json=data)
 
-        yield accounts_json
-        page += 1
+    first_page = await get_page(0)
+    total_pages = first_page["pagination"]["totalPages"]
+
+    if total_pages == 0:
+        return
+
+    yield first_page
+
+    pending: deque[asyncio.Task] = deque()
+    next_page = 1
+
+    try:
+        while next_page < total_pages or pending:
+            while next_page < total_pages and len(pending) < max(1, prefetch):
+                pending.append(asyncio.create_task(get_page(next_page)))
+                next_page += 1
+
+            yield await pending.popleft()
+    finally:
+        # The caller stopped iterating early or a page failed
+        for task in pending:
+            task.cancel()
 
 
 async def get_acct_event_registrations(
@@ -92,7 +175,6 @@ async def get_acct_event_registrations(
         for the account.
     """
     resource_path = f"/v2/accounts/{neon_id}/eventRegistrations"
-    max_retries = 10
 
     params = {
         "currentPage": 0,
@@ -101,88 +183,235 @@ async def get_acct_event_registrations(
         "sortDirection": "ASC",
     }
 
-    for i in range(max_retries):
-        async with aio_session.get(resource_path, params=params) as event_registrations:
-            if event_registrations.status == 200:
-                event_registrations_json = await event_registrations.json()
-                event_registrations_json = event_registrations_json.get(
-                    "eventRegistrations"
-                )
-                break
-            if event_registrations.status in set([429, 502]):
-                await asyncio.sleep(backoff_time(i))
-            else:
-                print(event_registrations.status)
-                return None
+    event_registrations_json = await neon_request(
+        aio_session, "GET", resource_path, params=params
+    )
+    event_registrations_json = event_registrations_json.get("eventRegistrations")
 
     if not event_registrations_json:
         return []
     all_registrations = []
     for event in event_registrations_json:
+        event_id = event["eventId"]
+
+        stored_event = await stored_events.get(
+            event_id, lambda event_id=event_id: get_event(aio_session, event_id)
+        )
 
-        status = event["tickets"][0]["attendees"][0]["registrationStatus"]
-        status = NeonEventRegistrationStatus(status)
-        if status != NeonEventRegistrationStatus.SUCCEEDED:
+        registration = parse_registration(event, event_id, stored_event)
+        if registration is None:
             continue
 
-        # registration_date = datetime.datetime.strptime(
-        #    event["registrationDateTime"], "%Y-%m-%dT%H:%M:%SZ"
-        # ).date()
-        event_id = event["eventId"]
-        registration_amount = event["registrationAmount"]
-
-        if not (stored_event := stored_events.get(event_id)):
-
-            for i in range(max_retries):
-                async with aio_session.get(f"/v2/events/{event_id}") as event:
-                    if event.status == 200:
-                        event_json = await event.json()
-                        break
-                    if event.status in set([429, 502]):
-                        await asyncio.sleep(backoff_time(i))
-                    else:
-                        print(event.status)
-                        return None
-
-            event_name = event_json["name"].split(" w/")[0]
-            event_date = datetime.datetime.strptime(
-                event_json["eventDates"]["startDate"], "%Y-%m-%d"
-            ).date()
-            event_category = "None"
-            if category := event_json["category"]:
-                event_category = category.get("name")
+        all_registrations.append(registration)
 
-            neon_event_type = NeonEventType(
-                name=event_name,
-                category=NeonEventCategory(event_category),
-            )
+    return all_registrations
 
-            stored_event = StoredNeonEvent(
-                event_name=event_name,
-                event_date=event_date,
-                event_type=neon_event_type,
-                category=NeonEventCategory(event_category),
-            )
 
-            stored_events[event_id] = stored_event
+def parse_registration(
+    registration_json: dict, event_id: str | int, stored_event: StoredNeonEvent
+) -> NeonEventRegistration | None:
+    """
+    Builds an event registration from the Neon API, or None unless it succeeded.
 
-        else:
-            neon_event_type = stored_event.event_type
-            event_date = stored_event.event_date
+    Parameters:
+        registration_json (dict): The registration as returned by the Neon API.
+        event_id (str | int): The Neon ID of the event registered for.
+        stored_event (StoredNeonEvent): The event registered for.
 
-        all_registrations.append(
-            NeonEventRegistration(
-                event_id=event_id,
-                registration_status=status,
-                event_type=neon_event_type,
-                event_date=event_date,
-                registration_amount=registration_amount,
-            )
+    Returns:
+        registration (NeonEventRegistration | None): The registration if it succeeded.
+    """
+    status = registration_json["tickets"][0]["attendees"][0]["registrationStatus"]
+    status = NeonEventRegistrationStatus(status)
+    if status != NeonEventRegistrationStatus.SUCCEEDED:
+        return None
+
+    # registration_date = datetime.datetime.strptime(
+    #    event["registrationDateTime"], "%Y-%m-%dT%H:%M:%SZ"
+    # ).date()
+
+    return NeonEventRegistration(
+        event_id=event_id,
+        registration_status=status,
+        event_type=stored_event.event_type,
+        event_date=stored_event.event_date,
+        registration_amount=registration_json["registrationAmount"],
+    )
+
+
+async def get_event_registrations(
+    aio_session: aiohttp.ClientSession, event_id: int, stored_event: StoredNeonEvent
+) -> list[tuple[int, str, NeonEventRegistration]]:
+    """
+    Asynchronously retrieves all successful registrations for an event from the Neon API.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        event_id (int): The Neon ID of the event to retrieve registrations for.
+        stored_event (StoredNeonEvent): The event itself.
+
+    Returns:
+        registrations (list[tuple[int, str, NeonEventRegistration]]): The registrant
+        account ID, registration time and registration of each successful registration.
+    """
+    resource_path = f"/v2/events/{event_id}/eventRegistrations"
+
+    all_registrations = []
+    page, total_pages = 0, 1
+
+    while page < total_pages:
+        params = {
+            "currentPage": page,
+            "pageSize": 200,
+            "sortColumn": "registrationDateTime",
+            "sortDirection": "ASC",
+        }
+
+        registrations_json = await neon_request(
+            aio_session, "GET", resource_path, params=params
         )
+        total_pages = registrations_json["pagination"]["totalPages"]
+        page += 1
+
+        for registration_json in registrations_json.get("eventRegistrations") or []:
+            registration = parse_registration(
+                registration_json, str(event_id), stored_event
+            )
+            if registration is None:
+                continue
+
+            all_registrations.append(
+                (
+                    int(registration_json["registrantAccountId"]),
+                    registration_json["registrationDateTime"],
+                    registration,
+                )
+            )
 
     return all_registrations
 
 
+async def search_events(
+    aio_session: aiohttp.ClientSession, start_date: datetime.date | None
+) -> dict[int, StoredNeonEvent]:
+    """
+    Asynchronously retrieves every Neon event starting on or after a date.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        start_date (datetime.date | None): The earliest event start date to include, or
+        None for every event.
+
+    Returns:
+        events (dict[int, StoredNeonEvent]): The events keyed by their Neon ID.
+    """
+    # A search needs at least one field, so every event is read as those starting before
+    # today and those starting from today on
+    split_date = start_date or run_date()
+    searches = [
+        [
+            {
+                "field": "Event Start Date",
+                "operator": "GREATER_AND_EQUAL",
+                "value": split_date.isoformat(),
+            }
+        ]
+    ]
+    if start_date is None:
+        searches.append(
+            [
+                {
+                    "field": "Event Start Date",
+                    "operator": "LESS_THAN",
+                    "value": split_date.isoformat(),
+                }
+            ]
+        )
+
+    output_fields = [
+        "Event ID",
+        "Event Name",
+        "Event Start Date",
+        "Event Category Name",
+    ]
+
+    events = {}
+    for search_fields in searches:
+        async for page in search_all(
+            aio_session, "/v2/events/search", search_fields, output_fields
+        ):
+            for result in page["searchResults"]:
+                events[int(result["Event ID"])] = parse_event(
+                    result["Event Name"],
+                    result["Event Start Date"],
+                    result.get("Event Category Name"),
+                )
+
+    return events
+
+
+async def get_event(
+    aio_session: aiohttp.ClientSession, event_id: str | int
+) -> StoredNeonEvent:
+    """
+    Asynchronously retrieves a single Neon event from the Neon API.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        event_id (str | int): The Neon ID of the event to retrieve.
+
+    Returns:
+        event (StoredNeonEvent): The event with the specified Neon ID.
+    """
+    resource_path = f"/v2/events/{event_id}"
+
+    event_json = await neon_request(aio_session, "GET", resource_path)
+
+    category = event_json["category"]
+
+    return parse_event(
+        event_json["name"],
+        event_json["eventDates"]["startDate"],
+        category.get("name") if category else None,
+    )
+
+
+def parse_event(name: str, start_date: str, category: str | None) -> StoredNeonEvent:
+    """
+    Builds a stored event from the Neon API.
+
+    Parameters:
+        name (str): The full event name, including the instructor.
+        start_date (str): The event start date, as YYYY-MM-DD.
+        category (str | None): The name of the event category, if it has one. Categories
+        missing from NeonEventCategory are treated as NONE.
+
+    Returns:
+        event (StoredNeonEvent): The event.
+    """
+    event_name = name.split(" w/")[0]
+    event_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+
+    try:
+        event_category = NeonEventCategory(category or "None")
+    except ValueError:
+        logging.warning("Unknown category %r of event %s", category, name)
+        event_category = NeonEventCategory.NONE
+
+    return StoredNeonEvent(
+        event_name=event_name,
+        event_date=event_date,
+        event_type=NeonEventType(
+            name=event_name,
+            category=event_category,
+        ),
+        category=event_category,
+    )
+
+
 async def get_acct_membership_data(
     aio_session: aiohttp.ClientSession, neon_id: str
 ) -> list[NeonMembership]:
@@ -205,18 +434,11 @@ async def get_acct_membership_data(
         "sortColumn": "date",
         "sortDirection": "ASC",
     }
-    max_retries = 10
 
-    for i in range(max_retries):
-        async with aio_session.get(resource_path, params=params) as memberships:
-            if memberships.status == 200:
-                memberships_json = await memberships.json()
-                memberships_json = memberships_json.get("memberships")
-                break
-            if memberships.status in set([429, 502]):
-                await asyncio.sleep(backoff_time(i))
-            else:
-                print(memberships.status)
+    memberships_json = await neon_request(
+        aio_session, "GET", resource_path, params=params
+    )
+    memberships_json = memberships_json.get("memberships")
 
     if not memberships_json:
         return []
@@ -269,18 +491,11 @@ async def get_acct_donation_data(
         "sortColumn": "date",
         "sortDirection": "ASC",
     }
-    max_retries = 10
 
-    for i in range(max_retries):
-        async with aio_session.get(resource_path, params=params) as donations:
-            if donations.status == 200:
-                donations_json = await donations.json()
-                donations_json = donations_json.get("donations")
-                break
-            if donations.status in set([429, 502]):
-                await asyncio.sleep(backoff_time(i))
-            else:
-                print(donations.status)
+    donations_json = await neon_request(
+        aio_session, "GET", resource_path, params=params
+    )
+    donations_json = donations_json.get("donations")
 
     if not donations_json:
         return []
@@ -303,7 +518,11 @@ async def get_acct_donation_data(
 
 
 async def get_individual_account(
-    aio_session: aiohttp.ClientSession, neon_id: int, current_membership_status: str
+    aio_session: aiohttp.ClientSession,
+    neon_id: int,
+    current_membership_status: str,
+    registrations: "RegistrationIndex | None" = None,
+    history: "AccountHistory | None" = None,
 ) -> NeonAccount:
     """
     Asynchronously retrieves a single Neon account from the Neon API.
@@ -312,25 +531,17 @@ async def get_individual_account(
         aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
         HTTP requests.
         neon_id (str): The Neon ID of the account to retrieve.
+        registrations (RegistrationIndex | None): Synced event registrations to read the
+        account's registrations from instead of requesting them.
+        history (AccountHistory | None): Synced memberships and donations to read the
+        account's history from instead of requesting it.
 
     Returns:
         account (dict): The Neon account with the specified Neon ID.
     """
     resource_path = f"/v2/accounts/{neon_id}"
-    max_retries = 10
-
-    for i in range(max_retries):
-        async with aio_session.get(resource_path) as account:
-            if account.status == 200:
-                account_json = await account.json()
-                break
-            if account.status in set([429, 502]):
-                await asyncio.sleep(backoff_time(i))
-            else:
-                print(account.status)
-                return None
 
-    membership_status = AccountCurrentMembershipStatus(current_membership_status)
+    account_json = await neon_request(aio_session, "GET", resource_path)
 
     try:
         first_name = account_json["individualAccount"]["primaryContact"].get(
@@ -424,13 +635,6 @@ async def get_individual_account(
     else:
         teacher, steward, volunteer = False, False, False
 
-    async with asyncio.TaskGroup() as tg:
-        memberships = tg.create_task(get_acct_membership_data(aio_session, neon_id))
-        event_registrations = tg.create_task(
-            get_acct_event_registrations(aio_session, neon_id)
-        )
-        donations = tg.create_task(get_acct_donation_data(aio_session, neon_id))
-
     basic_info = BasicAccountInfo(
         neon_id=neon_id,
         first_name=first_name,
@@ -456,18 +660,81 @@ async def get_individual_account(
         address=street,
     )
 
+    return await build_neon_account(
+        aio_session,
+        basic_info,
+        location_info,
+        family_membership,
+        current_membership_status,
+        registrations,
+        history,
+    )
+
+
+async def build_neon_account(
+    aio_session: aiohttp.ClientSession,
+    basic_info: BasicAccountInfo,
+    location_info: AccountLocationInfo,
+    family_membership: bool,
+    current_membership_status: str,
+    registrations: "RegistrationIndex | None" = None,
+    history: "AccountHistory | None" = None,
+) -> NeonAccount:
+    """
+    Asynchronously retrieves the memberships, event registrations and donations of an
+    account from the Neon API and combines them with its contact details.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        basic_info (BasicAccountInfo): The contact details of the account.
+        location_info (AccountLocationInfo): The primary address of the account.
+        family_membership (bool): Whether the account is part of a family group.
+        current_membership_status (str): The account's current membership status.
+        registrations (RegistrationIndex | None): Synced event registrations to read the
+        account's registrations from instead of requesting them.
+        history (AccountHistory | None): Synced memberships and donations to read the
+        account's history from instead of requesting it.
+
+    Returns:
+        account (NeonAccount): The complete Neon account.
+    """
+    neon_id = basic_info.neon_id
+    membership_status = AccountCurrentMembershipStatus(current_membership_status)
+
+    async with asyncio.TaskGroup() as tg:
+        if history is None:
+            memberships = tg.create_task(get_acct_membership_data(aio_session, neon_id))
+            donations = tg.create_task(get_acct_donation_data(aio_session, neon_id))
+        if registrations is None:
+            event_registrations = tg.create_task(
+                get_acct_event_registrations(aio_session, neon_id)
+            )
+
+    if history is not None:
+        memberships = history.get_memberships(neon_id)
+        donations = history.get_donations(neon_id)
+    else:
+        memberships = memberships.result()
+        donations = donations.result()
+
+    if registrations is not None:
+        event_registrations = registrations.get(neon_id)
+    else:
+        event_registrations = event_registrations.result()
+
     membership_info = AccountMembershipInfo(
-        memberships=memberships.result(),
+        memberships=memberships,
         family_membership=family_membership,
         current_membership_status=membership_status,
     )
 
     donation_info = AccountDonationInfo(
-        donations=donations.result(),
+        donations=donations,
     )
 
     event_info = AccountEventInfo(
-        event_registrations=event_registrations.result(),
+        event_registrations=event_registrations,
     )
 
     return NeonAccount(
@@ -477,3 +744,180 @@ async def get_individual_account(
         event_info=event_info,
         donation_info=donation_info,
     )
+
+
+async def get_custom_field_ids(
+    aio_session: aiohttp.ClientSession, category: str = "Account"
+) -> dict[str, int]:
+    """
+    Asynchronously retrieves the IDs of the Neon custom fields of a category, which the
+    search endpoints take in place of a name in their output fields.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        category (str): The custom field category, e.g. Account.
+
+    Returns:
+        field_ids (dict[str, int]): The ID of each custom field keyed by its name.
+    """
+    resource_path = "/v2/customFields"
+
+    fields_json = await neon_request(
+        aio_session, "GET", resource_path, params={"category": category}
+    )
+
+    return {field["name"]: int(field["id"]) for field in fields_json}
+
+
+async def get_account_detail_output_fields(
+    aio_session: aiohttp.ClientSession,
+) -> list[str | int]:
+    """
+    The account search output fields holding everything get_individual_account reads
+    from an account, for building accounts with get_searched_account.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+
+    Returns:
+        output_fields (list[str | int]): Standard field names followed by custom field IDs.
+    """
+    field_ids = await get_custom_field_ids(aio_session)
+
+    if missing := [name for name in ACCOUNT_CUSTOM_FIELDS if name not in field_ids]:
+        logging.warning("Neon has no account custom fields named %s", missing)
+
+    return ACCOUNT_DETAIL_OUTPUT_FIELDS + [
+        field_ids[name] for name in ACCOUNT_CUSTOM_FIELDS if name in field_ids
+    ]
+
+
+def search_value(search_result: dict, field: str) -> str | None:
+    """A field of an account search result, None when Neon returned it blank."""
+    value = search_result.get(field)
+
+    if value is None:
+        return None
+
+    return str(value).strip() or None
+
+
+def search_values(search_result: dict, field: str) -> list[str]:
+    """The selected options of a multi-value field of an account search result."""
+    if value := search_value(search_result, field):
+        return [i.strip() for i in value.split(SEARCH_VALUE_SEPARATOR)]
+
+    return []
+
+
+def parse_account_search_result(
+    search_result: dict,
+) -> tuple[BasicAccountInfo, AccountLocationInfo, bool]:
+    """
+    Builds the contact details of an account from an account search result requested with
+    get_account_detail_output_fields, read the same way get_individual_account reads them
+    from the account itself.
+
+    Parameters:
+        search_result (dict): A row of the account search results.
+
+    Returns:
+        basic_info (BasicAccountInfo): The contact details of the account.
+        location_info (AccountLocationInfo): The primary address of the account.
+        family_membership (bool): Whether the account is part of a family group.
+    """
+    birthdate = None
+    dob = [search_value(search_result, f"DOB {i}") for i in ("Year", "Month", "Day")]
+    if all(dob):
+        try:
+            birthdate = datetime.date(*(int(i) for i in dob))
+        except ValueError:
+            birthdate = None
+
+    waiver_date = search_value(search_result, "WaiverDate")
+    if waiver_date:
+        waiver_date = datetime.datetime.strptime(waiver_date, "%m/%d/%Y").date()
+
+    orientation_date = search_value(search_result, "FacilityTourDate")
+    if orientation_date:
+        orientation_date = datetime.datetime.strptime(
+            orientation_date, "%m/%d/%Y"
+        ).date()
+
+    referral_source = None
+    if referral := search_values(search_result, "Referral Source"):
+        referral_source = referral[0]
+
+    family_membership = "Yes" in search_values(
+        search_result, "Family Group Sub Member"
+    ) or "Family Group Primary Member" in search_values(
+        search_result, "FamilyGroupPrimaryMember"
+    )
+
+    types = search_values(search_result, "Individual Type")
+
+    basic_info = BasicAccountInfo(
+        neon_id=search_result["Account ID"],
+        first_name=search_value(search_result, "First Name"),
+        last_name=search_value(search_result, "Last Name"),
+        email=search_value(search_result, "Email 1"),
+        phone=search_value(search_result, "Phone 1 Full Number (F)"),
+        gender=search_value(search_result, "Gender"),
+        birthdate=birthdate,
+        referral_source=referral_source,
+        openpath_id=search_value(search_result, "OpenPathID"),
+        discourse_id=search_value(search_result, "DiscourseID"),
+        waiver_date=waiver_date,
+        orientation_date=orientation_date,
+        teacher="Instructor" in types,
+        steward="Steward" in types or "Super Steward" in types,
+        volunteer="Volunteer" in types,
+    )
+
+    location_info = AccountLocationInfo(
+        city=search_value(search_result, "City"),
+        state=search_value(search_result, "State/Province"),
+        zip=search_value(search_result, "Zip Code"),
+        address=search_value(search_result, "Address Line 1"),
+    )
+
+    return basic_info, location_info, family_membership
+
+
+async def get_searched_account(
+    aio_session: aiohttp.ClientSession,
+    search_result: dict,
+    registrations: "RegistrationIndex | None" = None,
+    history: "AccountHistory | None" = None,
+) -> NeonAccount:
+    """
+    Asynchronously builds a Neon account from an account search result requested with
+    get_account_detail_output_fields, without retrieving the account itself.
+
+    Parameters:
+        aioSession (aiohttp.ClientSession): The aiohttp client session to use for making
+        HTTP requests.
+        search_result (dict): A row of the account search results.
+        registrations (RegistrationIndex | None): Synced event registrations to read the
+        account's registrations from instead of requesting them.
+        history (AccountHistory | None): Synced memberships and donations to read the
+        account's history from instead of requesting it.
+
+    Returns:
+        account (NeonAccount): The complete Neon account.
+    """
+    basic_info, location_info, family_membership = parse_account_search_result(
+        search_result
+    )
+
+    return await build_neon_account(
+        aio_session,
+        basic_info,
+        location_info,
+        family_membership,
+        search_result["Account Current Membership Status"],
+        registrations,
+        history,
+    )
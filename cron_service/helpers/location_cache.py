@@ -0,0 +1,144 @@
+# pylint: disable=import-error
+
+import datetime
+import logging
+import math
+import threading
+
+import googlemaps
+import sqlalchemy
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_upsert
+
+from schema import DriveTime, Geocode
+
+
+class DriveTimeCache:
+    """
+    Postgres backed cache of Google Maps drive times from member addresses to Asmbly,
+    keyed by AccountLocationInfo.cache_key so a changed address is always looked up again.
+
+    The whole table is read once at startup, lookups are served from memory and new
+    results are buffered and upserted in batches. Entries older than ttl are treated as
+    missing and refreshed from Google Maps.
+    """
+
+    def __init__(
+        self,
+        sql_engine: sqlalchemy.Engine,
+        ttl: datetime.timedelta,
+        batch_size: int = 200,
+    ):
+        self.sql_engine = sql_engine
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, dict[str, float]] = {}
+        self._pending: dict[str, dict[str, float]] = {}
+        # Lookups happen in worker threads since the Google Maps client is synchronous
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read all unexpired drive times from the database."""
+        cutoff = datetime.date.today() - self.ttl
+
+        with Session(self.sql_engine) as session:
+            stmt = select(DriveTime).where(DriveTime.updated_on >= cutoff)
+            for row in session.scalars(stmt):
+                self._entries[row.address] = {
+                    "distance": math.nan if row.distance is None else row.distance,
+                    "time": math.nan if row.time is None else row.time,
+                }
+
+        logging.info("Loaded %d cached drive times", len(self._entries))
+
+    def get(self, key: str) -> dict[str, float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key: str, distances: dict[str, float]) -> None:
+        with self._lock:
+            self._entries[key] = distances
+            self._pending[key] = distances
+            flush = len(self._pending) >= self.batch_size
+
+        if flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Upsert all drive times looked up since the last flush."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        today = datetime.date.today()
+        rows = [
+            {
+                "address": key,
+                "distance": None if math.isnan(d["distance"]) else d["distance"],
+                "time": None if math.isnan(d["time"]) else d["time"],
+                "updated_on": today,
+            }
+            for key, d in pending.items()
+        ]
+
+        stmt = pg_upsert(DriveTime).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DriveTime.address],
+            set_={
+                DriveTime.distance: stmt.excluded.distance,
+                DriveTime.time: stmt.excluded.time,
+                DriveTime.updated_on: stmt.excluded.updated_on,
+            },
+        )
+
+        with Session(self.sql_engine) as session:
+            session.execute(stmt)
+            session.commit()
+
+
+def get_cached_geocode(
+    sql_engine: sqlalchemy.Engine,
+    gmaps: googlemaps.Client,
+    address: str,
+    ttl: datetime.timedelta,
+) -> dict[str, float]:
+    """
+    Return the lat/lng of an address, only calling the Google Maps geocoding API when the
+    stored location is missing or older than ttl.
+    """
+    with Session(sql_engine) as session:
+        row = session.get(Geocode, address)
+
+        if row and row.updated_on >= datetime.date.today() - ttl:
+            return {"lat": row.lat, "lng": row.lng}
+
+        location = gmaps.geocode(address)[0]["geometry"]["location"]
+
+        stmt = pg_upsert(Geocode).values(
+            address=address,
+            lat=location["lat"],
+            lng=location["lng"],
+            updated_on=datetime.date.today(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Geocode.address],
+            set_={
+                Geocode.lat: stmt.excluded.lat,
+                Geocode.lng: stmt.excluded.lng,
+                Geocode.updated_on: stmt.excluded.updated_on,
+            },
+        )
+        session.execute(stmt)
+        session.commit()
+
+    return {"lat": location["lat"], "lng": location["lng"]}
@@ -0,0 +1,94 @@
+# pylint: disable=import-error
+
+import asyncio
+import logging
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_upsert
+
+from schema import Member
+
+# Attempts at writing a batch before its rows are counted as failed
+WRITE_ATTEMPTS = 3
+
+
+class BulkMemberWriter:
+    """
+    Buffer scored member rows and upsert them into the member table with one multi-row
+    INSERT ... ON CONFLICT statement and one transaction per flush.
+
+    Writes run in a worker thread so Neon requests keep flowing on the event loop while
+    Postgres commits. Flushes are serialized, rows added meanwhile start the next batch.
+    A batch that still fails after WRITE_ATTEMPTS is logged and every row in it counted
+    in failed, rather than raised into whichever account triggered the flush.
+    """
+
+    def __init__(self, sql_engine: sqlalchemy.Engine, batch_size: int):
+        self.sql_engine = sql_engine
+        self.batch_size = batch_size
+        self.written = 0
+        self.failed = 0
+        # Keyed by neon_id, a single statement cannot upsert the same row twice
+        self._rows: dict[int, dict[str, Any]] = {}
+        self._write_lock = asyncio.Lock()
+
+    async def add(self, row: dict[str, Any]) -> None:
+        self._rows[row["neon_id"]] = row
+
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered rows to the database."""
+        if not self._rows:
+            return
+
+        rows = list(self._rows.values())
+        self._rows = {}
+
+        async with self._write_lock:
+            for attempt in range(1, WRITE_ATTEMPTS + 1):
+                try:
+                    await asyncio.to_thread(self._write, rows)
+                    break
+                except sqlalchemy.exc.SQLAlchemyError as e:
+                    if attempt == WRITE_ATTEMPTS:
+                        self.failed += len(rows)
+                        logging.exception(
+                            "Gave up writing %d members: %s",
+                            len(rows),
+                            ", ".join(str(row["neon_id"]) for row in rows),
+                        )
+                        return
+
+                    logging.warning(
+                        "Failed to write %d members, retrying: %s", len(rows), e
+                    )
+                    await asyncio.sleep(2**attempt)
+
+        self.written += len(rows)
+        logging.info("Wrote %d members (%d total)", len(rows), self.written)
+
+    def _write(self, rows: list[dict[str, Any]]) -> None:
+        stmt = pg_upsert(Member).values(rows)
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Member.neon_id],
+            set_={
+                Member.zip_code: stmt.excluded.zip_code,
+                Member.membership_duration: stmt.excluded.membership_duration,
+                Member.risk_score: stmt.excluded.risk_score,
+                Member.active: stmt.excluded.active,
+                Member.first_name: stmt.excluded.first_name,
+                Member.last_name: stmt.excluded.last_name,
+                Member.email: stmt.excluded.email,
+                Member.neon_last_modified: stmt.excluded.neon_last_modified,
+                Member.input_fingerprint: stmt.excluded.input_fingerprint,
+            },
+        )
+
+        with Session(self.sql_engine) as sql_session:
+            sql_session.execute(stmt)
+            sql_session.commit()
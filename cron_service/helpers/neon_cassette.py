@@ -0,0 +1,163 @@
+# pylint: disable=import-error
+
+import atexit
+import datetime
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
+from enum import StrEnum
+from typing import Any
+
+# Path of the gzipped JSON lines file requests are recorded to or replayed from
+NEON_CASSETTE = os.environ.get("NEON_CASSETTE")
+NEON_CASSETTE_MODE = os.environ.get("NEON_CASSETTE_MODE", "replay")
+# Records written between flushes of the cassette file
+CASSETTE_FLUSH_INTERVAL = 100
+# Also replay recorded throttling, server errors and response times
+NEON_CASSETTE_REALISTIC = (
+    os.environ.get("NEON_CASSETTE_REALISTIC", "false").lower() == "true"
+)
+# Date the jobs run as, set to the recording date when replaying since searches carry
+# dates computed from it
+NEON_CASSETTE_DATE = os.environ.get("NEON_CASSETTE_DATE")
+
+
+class CassetteMode(StrEnum):
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+@dataclass
+class RecordedResponse:
+    status: int
+    data: Any = None
+    retry_after: float | None = None
+    latency: float = 0.0
+
+
+def run_date() -> datetime.date:
+    """Today, or NEON_CASSETTE_DATE when set, for every date sent to Neon."""
+    if NEON_CASSETTE_DATE:
+        return datetime.date.fromisoformat(NEON_CASSETTE_DATE)
+
+    return datetime.date.today()
+
+
+def request_key(method: str, path: str, kwargs: dict[str, Any]) -> str:
+    """Identify a request by its method, path, query parameters and JSON body."""
+    request = {
+        "method": method,
+        "path": path,
+        "params": kwargs.get("params"),
+        "json": kwargs.get("json"),
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class Cassette:
+    """
+    Record Neon API responses to a file and replay them in place of the network.
+
+    Responses are stored per request in the order they were received, so a request that
+    was throttled before it succeeded replays the same way. Unless realistic is set, replay
+    skips straight to the successful response and does not wait.
+    """
+
+    def __init__(self, path: str, mode: CassetteMode, realistic: bool = False):
+        self.path = path
+        self.mode = mode
+        self.realistic = realistic
+        self._responses: dict[str, deque[RecordedResponse]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._file = None
+        self._unflushed = 0
+
+        if mode == CassetteMode.REPLAY:
+            self._load()
+        else:
+            # Appending lets an interrupted run be recorded again without losing the rest
+            self._file = gzip.open(path, "at", encoding="utf-8")
+            atexit.register(self.close)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == CassetteMode.REPLAY
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    entry = json.loads(line)
+                    key = entry.pop("key")
+                    self._responses[key].append(RecordedResponse(**entry))
+            except (EOFError, json.JSONDecodeError):
+                # A recording that was killed mid-write, keep everything before the tear
+                logging.warning(
+                    "%s is truncated, replaying what was recorded", self.path
+                )
+
+        logging.info(
+            "Replaying %d Neon responses from %s",
+            sum(len(r) for r in self._responses.values()),
+            self.path,
+        )
+
+    def replay(
+        self, method: str, path: str, kwargs: dict[str, Any]
+    ) -> RecordedResponse | None:
+        """The next recorded response to a request, or None if there is none left."""
+        responses = self._responses.get(request_key(method, path, kwargs))
+
+        while responses:
+            response = responses.popleft()
+            if self.realistic or response.status == 200 or not responses:
+                return response
+
+        return None
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        kwargs: dict[str, Any],
+        response: RecordedResponse,
+    ) -> None:
+        """Append a response to the cassette file."""
+        line = json.dumps({"key": request_key(method, path, kwargs)} | asdict(response))
+
+        with self._lock:
+            self._file.write(line + "\n")
+            self._unflushed += 1
+            if self._unflushed >= CASSETTE_FLUSH_INTERVAL:
+                self._file.flush()
+                self._unflushed = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@functools.cache
+def open_cassette() -> Cassette | None:
+    """
+    The cassette configured by NEON_CASSETTE, if any. Opened on the first request rather
+    than at import, so its log lines go through the job's logging configuration.
+    """
+    if not NEON_CASSETTE:
+        return None
+
+    mode = CassetteMode(NEON_CASSETTE_MODE)
+    logging.info(
+        "Neon cassette %s in %s mode as of %s", NEON_CASSETTE, mode, run_date()
+    )
+
+    return Cassette(NEON_CASSETTE, mode, NEON_CASSETTE_REALISTIC)
@@ -0,0 +1,275 @@
+# pylint: disable=import-error
+
+import asyncio
+import logging
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+
+from helpers.api_exponential_backoff import backoff_time
+from helpers.neon_creds import N_HEADERS, N_BASE_URL, N_MAX_REQUESTS_PER_SECOND
+from helpers.rate_limiter import AdaptiveRateLimiter
+from helpers.neon_cassette import RecordedResponse, open_cassette
+
+MAX_RETRIES = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Consecutive server errors before requests are paused for CIRCUIT_COOLDOWN seconds
+CIRCUIT_FAILURE_THRESHOLD = 20
+CIRCUIT_COOLDOWN = 60
+# Cooldowns in a row without a successful request before Neon is treated as down
+CIRCUIT_MAX_OPENINGS = 5
+
+
+class NeonRequestError(Exception):
+    """A Neon API request failed and could not be retried."""
+
+    def __init__(self, method: str, path: str, status: int | None):
+        super().__init__(f"{method} {path} failed with status {status}")
+        self.method = method
+        self.path = path
+        self.status = status
+
+
+class CircuitOpenError(NeonRequestError):
+    """Neon has kept failing through repeated cooldowns and is treated as down."""
+
+
+class CassetteMissError(NeonRequestError):
+    """A request was made during replay that the cassette has no response for."""
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    errors: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100)[percent - 1]
+
+
+class CircuitBreaker:
+    """
+    Pause requests after repeated server errors until a cooldown has passed.
+
+    Callers wait out the cooldown rather than failing, so queued work resumes once Neon
+    recovers. After max_openings cooldowns in a row without a success the circuit stays
+    open and requests fail immediately for the rest of the run.
+    """
+
+    def __init__(self, threshold: int, cooldown: float, max_openings: int):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_openings = max_openings
+        self._failures = 0
+        self._openings = 0
+        self._opened_at: float | None = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self._openings >= self.max_openings
+
+    @property
+    def is_open(self) -> bool:
+        if self._opened_at is None:
+            return False
+        if self.exhausted:
+            return True
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            # Half open, let requests through and close again on the first success
+            self._opened_at = None
+            self._failures = self.threshold - 1
+            return False
+        return True
+
+    async def wait(self) -> None:
+        """Sleep until the circuit is closed or has been open too many times."""
+        while self.is_open and not self.exhausted:
+            await asyncio.sleep(self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._openings = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.threshold and self._opened_at is None:
+            self._opened_at = time.monotonic()
+            self._openings += 1
+
+            if self.exhausted:
+                logging.error(
+                    "Neon API still failing after %d pauses, giving up on it",
+                    self._openings,
+                )
+            else:
+                logging.warning(
+                    "%d consecutive Neon API failures, pausing requests for %ds",
+                    self._failures,
+                    self.cooldown,
+                )
+
+
+def create_limiter(max_requests_per_second: float) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(
+        max_requests_per_second, burst=max(1, int(max_requests_per_second))
+    )
+
+
+neon_limiter = create_limiter(N_MAX_REQUESTS_PER_SECOND)
+circuit_breaker = CircuitBreaker(
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, CIRCUIT_MAX_OPENINGS
+)
+endpoint_stats: dict[str, EndpointStats] = {}
+
+
+def configure_limiter(max_requests_per_second: float) -> None:
+    """Replace neon_limiter, for callers that set the rate other than through the env."""
+    global neon_limiter  # pylint: disable=global-statement
+    neon_limiter = create_limiter(max_requests_per_second)
+
+
+def create_neon_session(**kwargs) -> aiohttp.ClientSession:
+    """Create an aiohttp session for making requests to the Neon API with neon_request."""
+    return aiohttp.ClientSession(headers=N_HEADERS, base_url=N_BASE_URL, **kwargs)
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Group requests by endpoint, e.g. GET /v2/accounts/{id}/memberships"""
+    path = re.sub(r"/\d+", "/{id}", path)
+    return f"{method} {path}"
+
+
+def retry_after(response: aiohttp.ClientResponse) -> float | None:
+    """Seconds to wait according to the Retry-After header, if Neon sent one."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def send_request(
+    aio_session: aiohttp.ClientSession, method: str, path: str, **kwargs: Any
+) -> RecordedResponse:
+    """
+    Send a single request to Neon, or replay it from the cassette, recording the response
+    if the cassette is recording. Replayed responses report their recorded latency.
+    """
+    cassette = open_cassette()
+
+    if cassette is not None and cassette.replaying:
+        response = cassette.replay(method, path, kwargs)
+        if response is None:
+            raise CassetteMissError(method, path, None)
+        if cassette.realistic:
+            await asyncio.sleep(response.latency)
+        return response
+
+    start = time.monotonic()
+    async with aio_session.request(method, path, **kwargs) as response:
+        recorded = RecordedResponse(
+            status=response.status,
+            data=await response.json() if response.status == 200 else None,
+            retry_after=retry_after(response),
+            latency=time.monotonic() - start,
+        )
+
+    if cassette is not None:
+        cassette.record(method, path, kwargs, recorded)
+
+    return recorded
+
+
+async def neon_request(
+    aio_session: aiohttp.ClientSession, method: str, path: str, **kwargs: Any
+) -> Any:
+    """
+    Make a request to the Neon API and return the decoded JSON response.
+
+    Every attempt waits for the shared neon_limiter. Throttled (429) and server error
+    responses are retried with jittered exponential backoff, honouring Retry-After when
+    present, and 429s also slow down the limiter. Latency and retry counts are recorded
+    per endpoint in endpoint_stats. With NEON_CASSETTE set, responses are recorded to or
+    replayed from the cassette, see helpers.neon_cassette.
+
+    Raises:
+        NeonRequestError: The request failed with a non-retryable status or ran out of
+        retries.
+        CircuitOpenError: Neon kept failing through CIRCUIT_MAX_OPENINGS cooldowns.
+        CassetteMissError: The cassette being replayed has no response to the request.
+    """
+    stats = endpoint_stats.setdefault(endpoint_name(method, path), EndpointStats())
+    status = None
+    cassette = open_cassette()
+    replaying = cassette is not None and cassette.replaying
+
+    for i in range(MAX_RETRIES):
+        await circuit_breaker.wait()
+        if circuit_breaker.is_open:
+            stats.errors += 1
+            raise CircuitOpenError(method, path, status)
+
+        if i > 0:
+            stats.retries += 1
+
+        if not replaying:
+            await neon_limiter.acquire()
+
+        stats.requests += 1
+        start = time.monotonic()
+        wait = None
+        try:
+            response = await send_request(aio_session, method, path, **kwargs)
+            status = response.status
+            if status == 200:
+                stats.latencies.append(response.latency)
+                neon_limiter.on_success()
+                circuit_breaker.record_success()
+                return response.data
+            wait = response.retry_after
+            stats.latencies.append(response.latency)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            logging.warning("%s %s: %r", method, path, e)
+            status = None
+            stats.latencies.append(time.monotonic() - start)
+
+        if status == 429:
+            stats.throttled += 1
+            neon_limiter.on_throttled()
+        elif status is None or status in RETRY_STATUSES:
+            circuit_breaker.record_failure()
+        else:
+            stats.errors += 1
+            raise NeonRequestError(method, path, status)
+
+        if not replaying or cassette.realistic:
+            await asyncio.sleep(
+                wait if wait is not None else backoff_time(i, jitter=True)
+            )
+
+    stats.errors += 1
+    raise NeonRequestError(method, path, status)
+
+
+def log_endpoint_stats() -> None:
+    """Log request counts, retries and latency for every Neon endpoint used."""
+    for name, stats in sorted(endpoint_stats.items()):
+        logging.info(
+            "%s: %d requests, %d retries, %d throttled, %d errors, "
+            "p50 %.3fs, p99 %.3fs",
+            name,
+            stats.requests,
+            stats.retries,
+            stats.throttled,
+            stats.errors,
+            stats.percentile(50),
+            stats.percentile(99),
+        )
@@ -20,6 +20,8 @@ N_USER = os.environ["NEON_USER"]
 # Neon Account Info
 N_AUTH = f"{N_USER}:{N_API_KEY}"
 N_BASE_URL = "https://api.neoncrm.com"
+# Requests per second allowed against the Neon API before it starts answering 429
+N_MAX_REQUESTS_PER_SECOND = float(os.environ.get("NEON_MAX_REQUESTS_PER_SECOND", 5))
 N_SIGNATURE = base64.b64encode(bytearray(N_AUTH.encode())).decode()
 N_HEADERS = {
     "Content-Type": "application/json",
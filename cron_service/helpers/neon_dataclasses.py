@@ -3,6 +3,8 @@
 from dataclasses import dataclass
 from collections import Counter
 import datetime
+import re
+from typing import TYPE_CHECKING
 import googlemaps
 import numpy as np
 
@@ -15,6 +17,9 @@ from helpers.enums import (
     AccountCurrentMembershipStatus,
 )
 
+if TYPE_CHECKING:
+    from helpers.location_cache import DriveTimeCache
+
 
 @dataclass
 class Donation:
@@ -92,12 +97,34 @@ class AccountLocationInfo:
     state: str | None
     zip: str | None
 
+    @property
+    def cache_key(self) -> str:
+        """
+        Normalized address used as the drive time cache key, so formatting differences
+        between runs do not cause cache misses while any real change to the address does.
+        """
+        zip_code = self.zip
+        if zip_match := re.match(r"^\s*(\d{5})", zip_code):
+            zip_code = zip_match.group(1)
+
+        key = f"{self.address}, {self.city}, {self.state} {zip_code}".lower()
+        key = re.sub(r"[.#,]", " ", key)
+        key = re.sub(r"\s+", " ", key).strip()
+
+        return key
+
     def get_distance_from_asmbly(
-        self, gmaps: googlemaps.Client, asmbly_geocode
+        self,
+        gmaps: googlemaps.Client,
+        asmbly_geocode,
+        cache: "DriveTimeCache | None" = None,
     ) -> dict[str, float] | dict[str, type[np.nan]]:
         """
         Call the Google Maps API to calculate the distance and time from Asmbly based on the
         address of the account.
+
+        If a cache is given it is checked before calling Google Maps, and every completed
+        lookup (including addresses with no route) is stored in it.
         """
         if (
             self.address is None
@@ -106,22 +133,36 @@ class AccountLocationInfo:
             or self.zip is None
         ):
             return {"distance": np.nan, "time": np.nan}
+
+        if cache is not None and (cached := cache.get(self.cache_key)) is not None:
+            return dict(cached)
+
         try:
-            routes = gmaps.directions(
-                origin=f"{self.address}, {self.city}, {self.state} {self.zip}",
-                destination=asmbly_geocode,
-                mode="driving",
-                avoid="tolls",
-                # departure_time=datetime.datetime.now(),
-                region="US",
-                language="en",
-                units="metric",
-                # traffic_model="best_guess",
-            )
+            distances = self._get_directions(gmaps, asmbly_geocode)
         except googlemaps.exceptions.ApiError as e:
             print(e)
             return {"distance": np.nan, "time": np.nan}
 
+        if cache is not None:
+            cache.set(self.cache_key, distances)
+
+        return distances
+
+    def _get_directions(
+        self, gmaps: googlemaps.Client, asmbly_geocode
+    ) -> dict[str, float] | dict[str, type[np.nan]]:
+        routes = gmaps.directions(
+            origin=f"{self.address}, {self.city}, {self.state} {self.zip}",
+            destination=asmbly_geocode,
+            mode="driving",
+            avoid="tolls",
+            # departure_time=datetime.datetime.now(),
+            region="US",
+            language="en",
+            units="metric",
+            # traffic_model="best_guess",
+        )
+
         try:
             routes = routes[0]
         except IndexError:
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many requests per second are sent to a single host.
+
+    Neon responds with 429 once an API key exceeds its request rate, so every request
+    waits in acquire for a token before it is sent.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate adapts to the throttling actually observed from the server.
+
+    Each 429 halves the rate (never below min_rate), and every run of successful requests
+    adds a little back (never above max_rate), so the limiter settles just under the rate
+    Neon will accept. 429s arriving within decrease_interval of the last decrease are
+    answers to requests sent at the old rate and do not lower it again.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float = 0.5,
+        max_rate: float | None = None,
+        increase_after: int = 20,
+        decrease_interval: float = 1.0,
+    ):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase_after = increase_after
+        self.decrease_interval = decrease_interval
+        self._successes = 0
+        self._decreased_at: float | None = None
+
+    def on_throttled(self) -> None:
+        """Record a 429 response."""
+        self._successes = 0
+
+        now = time.monotonic()
+        if (
+            self._decreased_at is not None
+            and now - self._decreased_at < self.decrease_interval
+        ):
+            return
+
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0)
+        self._decreased_at = now
+
+    def on_success(self) -> None:
+        """Record a successful response."""
+        self._successes += 1
+        if self._successes >= self.increase_after:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + 0.5)
+            self._successes = 0
@@ -0,0 +1,248 @@
+# pylint: disable=import-error
+
+import asyncio
+import datetime
+import logging
+import os
+from collections import defaultdict
+
+import aiohttp
+import sqlalchemy
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from helpers.event_catalogue import EventCatalogue
+from helpers.enums import NeonEventRegistrationStatus
+from helpers.get_neon_data import get_event, get_event_registrations, search_events
+from helpers.neon_cassette import run_date
+from helpers.neon_dataclasses import NeonEventRegistration, StoredNeonEvent
+from schema import EventInstance, EventRegistration
+
+# Earliest event start date whose registrations are synced, all events when unset
+EVENT_SYNC_START_DATE = (
+    datetime.date.fromisoformat(os.environ["EVENT_SYNC_START_DATE"])
+    if os.environ.get("EVENT_SYNC_START_DATE")
+    else None
+)
+# Events that started up to this many days ago are read again on every run, since their
+# registrations may still change. Older events are read once and then kept.
+EVENT_SYNC_LOOKBACK_DAYS = int(os.environ.get("EVENT_SYNC_LOOKBACK_DAYS", 30))
+# Events whose registrations are requested at the same time
+EVENT_SYNC_CONCURRENCY = int(os.environ.get("EVENT_SYNC_CONCURRENCY", 10))
+
+# A registrant account ID, registration time and registration
+IndexedRegistration = tuple[int, str, NeonEventRegistration]
+
+
+class RegistrationIndex:
+    """
+    Successful event registrations keyed by registrant account ID, persisted in the
+    event_registration table.
+
+    The first sync reads every event, or those since EVENT_SYNC_START_DATE. Later syncs only read
+    events that started in the last EVENT_SYNC_LOOKBACK_DAYS or that have not been synced
+    yet, so the number of Neon requests grows with the number of recent events rather
+    than with all events ever held.
+
+    If any event fails to sync the index is incomplete, and callers should read
+    registrations per account for that run instead.
+    """
+
+    def __init__(self):
+        # Registrations per event ID, as loaded or synced
+        self._by_event: dict[int, list[IndexedRegistration]] = {}
+        # Registration time and registration, per registrant account ID
+        self._registrations: dict[int, list[tuple[str, NeonEventRegistration]]] = (
+            defaultdict(list)
+        )
+        # Events stored in the database whose registrations have never been synced
+        self._unsynced: set[int] = set()
+        # Events synced since the last save
+        self._new: dict[int, list[IndexedRegistration]] = {}
+        self.events = 0
+        self.failed_events = 0
+
+    def __len__(self) -> int:
+        return len(self._registrations)
+
+    @property
+    def complete(self) -> bool:
+        """Whether every event was synced, so the index holds all registrations."""
+        return self.failed_events == 0
+
+    def load(self, sql_engine: sqlalchemy.Engine, catalogue: EventCatalogue) -> None:
+        """
+        Read the stored registrations of every synced event, which must already be in
+        the catalogue.
+        """
+        with Session(sql_engine) as session:
+            synced = session.scalars(
+                select(EventInstance.id).where(
+                    EventInstance.registrations_synced_on.is_not(None)
+                )
+            ).all()
+            self._unsynced = set(
+                session.scalars(
+                    select(EventInstance.id).where(
+                        EventInstance.registrations_synced_on.is_(None)
+                    )
+                ).all()
+            )
+
+            self._by_event = {event_id: [] for event_id in synced}
+
+            for row in session.execute(
+                select(
+                    EventRegistration.event_id,
+                    EventRegistration.neon_id,
+                    EventRegistration.registered_at,
+                    EventRegistration.registration_amount,
+                )
+            ):
+                stored_event = catalogue.lookup(row.event_id)
+                if stored_event is None or row.event_id not in self._by_event:
+                    continue
+
+                self._by_event[row.event_id].append(
+                    (
+                        row.neon_id,
+                        row.registered_at,
+                        NeonEventRegistration(
+                            event_id=str(row.event_id),
+                            registration_status=NeonEventRegistrationStatus.SUCCEEDED,
+                            event_type=stored_event.event_type,
+                            event_date=stored_event.event_date,
+                            registration_amount=row.registration_amount,
+                        ),
+                    )
+                )
+
+        self._index()
+
+        logging.info(
+            "Loaded registrations of %d synced events, %d events never synced",
+            len(self._by_event),
+            len(self._unsynced),
+        )
+
+    async def sync(
+        self,
+        aio_session: aiohttp.ClientSession,
+        catalogue: EventCatalogue,
+        start_date: datetime.date | None = EVENT_SYNC_START_DATE,
+        lookback_days: int = EVENT_SYNC_LOOKBACK_DAYS,
+        concurrency: int = EVENT_SYNC_CONCURRENCY,
+    ) -> None:
+        """
+        Read the registrations of recent and never synced events, adding the events
+        themselves to the catalogue. Every event since start_date, or every event at all
+        when it is None, is read when nothing has been synced before.
+        """
+        since = start_date
+        if self._by_event:
+            recent = run_date() - datetime.timedelta(lookback_days)
+            since = recent if start_date is None else max(start_date, recent)
+
+        events = await search_events(aio_session, since)
+        unsynced = set()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def sync_event(event_id: int, event: StoredNeonEvent | None) -> None:
+            try:
+                async with semaphore:
+                    if event is None:
+                        event = await catalogue.get(
+                            event_id, lambda: get_event(aio_session, event_id)
+                        )
+                    registrations = await get_event_registrations(
+                        aio_session, event_id, event
+                    )
+            except Exception:  # pylint: disable=broad-exception-caught
+                # One bad event should not abort the sync, but leaves the index incomplete
+                self.failed_events += 1
+                logging.exception("Failed to sync registrations of event %s", event_id)
+                return
+
+            self._by_event[event_id] = registrations
+            self._new[event_id] = registrations
+
+        async with asyncio.TaskGroup() as tg:
+            for event_id, event in events.items():
+                catalogue.add(event_id, event)
+                tg.create_task(sync_event(event_id, event))
+
+            for event_id in self._unsynced - events.keys():
+                event = catalogue.lookup(event_id)
+                if (
+                    event is None
+                    or start_date is None
+                    or event.event_date >= start_date
+                ):
+                    unsynced.add(event_id)
+                    tg.create_task(sync_event(event_id, event))
+
+        self.events = len(events) + len(unsynced)
+        self._index()
+
+        logging.info(
+            "Synced registrations of %d events since %s for %d accounts (%d failed)",
+            self.events,
+            since or "the first event",
+            len(self._registrations),
+            self.failed_events,
+        )
+
+    def save(self, sql_engine: sqlalchemy.Engine) -> None:
+        """
+        Replace the stored registrations of events synced since the last save. The events
+        must already be stored, see EventCatalogue.save.
+        """
+        if not self._new:
+            return
+
+        new, self._new = self._new, {}
+
+        with Session(sql_engine) as session:
+            session.execute(
+                delete(EventRegistration).where(EventRegistration.event_id.in_(new))
+            )
+
+            rows = [
+                {
+                    "event_id": event_id,
+                    "neon_id": neon_id,
+                    "registered_at": registered_at,
+                    "registration_amount": registration.registration_amount,
+                }
+                for event_id, registrations in new.items()
+                for neon_id, registered_at, registration in registrations
+            ]
+            if rows:
+                session.execute(insert(EventRegistration), rows)
+
+            session.execute(
+                update(EventInstance)
+                .where(EventInstance.id.in_(new))
+                .values(registrations_synced_on=run_date())
+            )
+            session.commit()
+
+        self._unsynced -= new.keys()
+
+        logging.info("Stored registrations of %d events", len(new))
+
+    def _index(self) -> None:
+        """Rebuild the per-account registrations from the per-event ones."""
+        self._registrations = defaultdict(list)
+
+        for registrations in self._by_event.values():
+            for neon_id, registered_at, registration in registrations:
+                self._registrations[neon_id].append((registered_at, registration))
+
+        # Same order as the registrations of a single account from Neon
+        for registrations in self._registrations.values():
+            registrations.sort(key=lambda r: r[0])
+
+    def get(self, neon_id: int | str) -> list[NeonEventRegistration]:
+        """The successful registrations of an account, oldest first."""
+        return [r for _, r in self._registrations.get(int(neon_id), [])]
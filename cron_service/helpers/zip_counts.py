@@ -0,0 +1,55 @@
+# pylint: disable=import-error
+
+import logging
+
+import sqlalchemy
+from sqlalchemy import select, delete, insert, case, func, literal_column
+from sqlalchemy.orm import Session
+
+from schema import Member, MemberZipCount
+
+# Lower bounds, in months, of the membership duration buckets
+DURATION_BUCKETS = (0, 1, 12, 36)
+
+
+def duration_bucket(duration: sqlalchemy.ColumnElement) -> sqlalchemy.ColumnElement:
+    """SQL expression mapping a membership duration in months to its bucket."""
+    return case(
+        *(
+            (duration >= lower, lower)
+            for lower in sorted(DURATION_BUCKETS, reverse=True)
+        ),
+        else_=0,
+    )
+
+
+def refresh_member_zip_counts(sql_engine: sqlalchemy.Engine) -> None:
+    """Rebuild the member_zip_count table from the member table in one transaction."""
+
+    counts = (
+        select(
+            Member.zip_code,
+            Member.active,
+            duration_bucket(Member.membership_duration).label("duration_bucket"),
+            func.count(),
+        ).where(Member.zip_code.is_not(None))
+        # Group by the output column, the CASE parameters differ on each repetition
+        .group_by(Member.zip_code, Member.active, literal_column("duration_bucket"))
+    )
+
+    with Session(sql_engine) as session:
+        session.execute(delete(MemberZipCount))
+        result = session.execute(
+            insert(MemberZipCount).from_select(
+                [
+                    MemberZipCount.zip_code,
+                    MemberZipCount.active,
+                    MemberZipCount.duration_bucket,
+                    MemberZipCount.count,
+                ],
+                counts,
+            )
+        )
+        session.commit()
+
+    logging.info("Refreshed member zip counts: %d rows", result.rowcount)
@@ -1,9 +1,13 @@
 """Seed the database with the intitial membership counts data"""
 
 import datetime
+import logging
 import polars as pl
 
-from engine import connection_uri
+from helpers.copy_seed import SEED_BATCH_SIZE, seed_table, source_id
+
+from engine import engine
+from schema import MembershipCount
 
 
 def load_subscriber_data(file_path: str) -> pl.LazyFrame:
@@ -37,93 +41,53 @@ def load_account_creations(file_path: str) -> pl.LazyFrame:
     )
 
 
-def find_churn_dates(struct: list[dict[str, datetime.date]]) -> list[datetime.date]:
-    """Find the churn dates"""
-    mem_start_dates = [s["start_date"] for s in struct]
-    mem_end_dates = [s["expired_on_date"] for s in struct]
-
-    churn_dates = []
-
-    for i in range(len(mem_start_dates) - 1):
-        if mem_start_dates[i + 1] - mem_end_dates[i] > datetime.timedelta(days=1):
-            churn_dates.append(mem_end_dates[i])
-
-    if mem_end_dates[-1] < datetime.date.today():
-        churn_dates.append(mem_end_dates[-1])
+def load_memberships(file_path: str) -> pl.LazyFrame:
+    """Load data from CSV file"""
+    return pl.scan_csv(file_path).select(
+        pl.col("Account ID").alias("neon_id"),
+        pl.col("Membership Start Date").str.to_date("%m/%d/%Y").alias("start_date"),
+        pl.col("Membership Expiration Date")
+        .str.to_date("%m/%d/%Y")
+        .alias("expired_on_date"),
+    )
 
-    return churn_dates
 
+def load_churns(memberships: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Count churns per day. A membership churns when the account's next membership starts
+    more than a day after it expires, or when it is the account's last membership and has
+    already expired.
+    """
+    next_start = pl.col("start_date").shift(-1).over("neon_id")
 
-def load_churns(file_path: str) -> pl.LazyFrame:
-    """Load data from CSV file"""
     return (
-        pl.scan_csv(file_path)
-        .select(
-            pl.col("Account ID").alias("neon_id"),
-            pl.col("Membership Start Date").str.to_date("%m/%d/%Y").alias("start_date"),
-            pl.col("Membership Expiration Date")
-            .str.to_date("%m/%d/%Y")
-            .alias("expired_on_date"),
-        )
-        .sort(by="expired_on_date")
-        .group_by("neon_id")
-        .agg(
-            pl.struct(["start_date", "expired_on_date"])
-            .map_elements(
-                lambda s: find_churn_dates(s),  # pylint: disable=unnecessary-lambda
-                return_dtype=pl.List(pl.Date),
+        memberships.sort(by=["neon_id", "expired_on_date"])
+        .filter(
+            (next_start - pl.col("expired_on_date") > datetime.timedelta(days=1))
+            | (
+                next_start.is_null()
+                & (pl.col("expired_on_date") < datetime.date.today())
             )
-            .alias("churn_dates")
         )
-        .explode("churn_dates")
-        # .filter(pl.col("neon_id") == 3944)
-        .filter(pl.col("churn_dates").is_not_null())
-        .group_by("churn_dates")
+        .group_by(pl.col("expired_on_date").alias("churn_dates"))
         .agg(pl.col("neon_id").count().alias("churn_count"))
     )
 
 
-def find_join_dates(struct: list[dict[str, datetime.date]]) -> list[datetime.date]:
-    """Find the join/rejoin dates"""
-    mem_start_dates = [s["start_date"] for s in struct]
-    mem_end_dates = [s["expired_on_date"] for s in struct]
-
-    join_dates = []
-
-    join_dates.append(mem_start_dates[0])
-
-    for i in range(len(mem_start_dates) - 1):
-        if mem_start_dates[i + 1] - mem_end_dates[i] > datetime.timedelta(days=1):
-            join_dates.append(mem_start_dates[i + 1])
+def load_joins(memberships: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Count joins per day. A membership is a join when it is the account's first, or when
+    it starts more than a day after the account's previous membership expired.
+    """
+    previous_end = pl.col("expired_on_date").shift(1).over("neon_id")
 
-    return join_dates
-
-
-def load_joins(file_path: str) -> pl.LazyFrame:
-    """Load data from CSV file"""
     return (
-        pl.scan_csv(file_path)
-        .select(
-            pl.col("Account ID").alias("neon_id"),
-            pl.col("Membership Start Date").str.to_date("%m/%d/%Y").alias("start_date"),
-            pl.col("Membership Expiration Date")
-            .str.to_date("%m/%d/%Y")
-            .alias("expired_on_date"),
-        )
-        .sort(by="start_date")
-        .group_by("neon_id")
-        .agg(
-            pl.struct(["start_date", "expired_on_date"])
-            .map_elements(
-                lambda s: find_join_dates(s),  # pylint: disable=unnecessary-lambda
-                return_dtype=pl.List(pl.Date),
-            )
-            .alias("join_dates")
+        memberships.sort(by=["neon_id", "start_date"])
+        .filter(
+            previous_end.is_null()
+            | (pl.col("start_date") - previous_end > datetime.timedelta(days=1))
         )
-        .explode("join_dates")
-        # .filter(pl.col("neon_id") == 3944)
-        .filter(pl.col("join_dates").is_not_null())
-        .group_by("join_dates")
+        .group_by(pl.col("start_date").alias("join_dates"))
         .agg(pl.col("neon_id").count().alias("member_signups_count"))
     )
 
@@ -154,29 +118,41 @@ def join_dataframes(
     )
 
 
-def write_db_from_csv(table_name: str, db_uri: str) -> None:
+def write_db_from_csv() -> None:
     """Seed the database with the intitial member data"""
-    sub_data = load_subscriber_data("./data/subscriber_counts.csv")
+    files = {
+        "subscribers": "./data/subscriber_counts.csv",
+        "account_creations": "./data/account_creations.csv",
+        "memberships": "./data/all_memberships.csv",
+    }
 
-    account_creations = load_account_creations("./data/account_creations.csv")
+    sub_data = load_subscriber_data(files["subscribers"])
 
-    churns = load_churns("./data/all_memberships.csv")
+    account_creations = load_account_creations(files["account_creations"])
 
-    joins = load_joins("./data/all_memberships.csv")
+    # Both are computed from one scan of the file, polars shares the common subplan
+    memberships = load_memberships(files["memberships"])
 
-    data = join_dataframes(sub_data, account_creations, churns, joins)
+    churns = load_churns(memberships)
 
-    data.write_database(
-        table_name=table_name, connection=db_uri, if_table_exists="append"
-    )
+    joins = load_joins(memberships)
 
-    # print(data)
+    data = join_dataframes(sub_data, account_creations, churns, joins)
 
-    # data.write_csv("test.csv")
+    seed_table(
+        engine,
+        MembershipCount.__table__,
+        data.iter_slices(SEED_BATCH_SIZE),
+        conflict_columns=["date"],
+        source=source_id(*files.values()),
+    )
 
 
 if __name__ == "__main__":
-    write_db_from_csv(
-        table_name="membership_count",
-        db_uri=connection_uri,
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
     )
+
+    write_db_from_csv()
@@ -2,15 +2,15 @@ import re
 import asyncio
 import logging
 import datetime
-import aiohttp
 
 from sqlalchemy import update, select
 from sqlalchemy.orm import Session
 
-from helpers.neon_creds import N_HEADERS, N_BASE_URL
+from helpers.neon_client import create_neon_session, log_endpoint_stats
 from helpers.get_neon_data import (
     get_all_accounts,
 )
+from helpers.zip_counts import refresh_member_zip_counts
 
 from engine import engine
 from schema import Member
@@ -60,14 +60,11 @@ async def main() -> None:
 
     bulk_updates = []
 
-    async with aiohttp.ClientSession(headers=N_HEADERS, base_url=N_BASE_URL) as session:
+    async with create_neon_session() as session:
 
         count = 0
         async for page in get_all_accounts(session, search_params, output_fields):
-            if page["pagination"]["currentPage"] < page["pagination"]["totalPages"]:
-                accts = page["searchResults"]
-            else:
-                break
+            accts = page["searchResults"]
 
             for i in accts:
                 if not i["Zip Code"]:
@@ -89,7 +86,10 @@ async def main() -> None:
                 if count % 50 == 0:
                     print(f"--- {count} ---")
 
+    log_endpoint_stats()
+
     update_member_zips_in_db(bulk_updates=bulk_updates)
+    refresh_member_zip_counts(engine)
 
 
 if __name__ == "__main__":
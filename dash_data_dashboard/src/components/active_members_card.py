@@ -1,98 +1,22 @@
-import datetime
 import polars as pl
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
+from dash_data_dashboard.src.data.dash_data.kpis import (
+    ACTIVE_MEMBER_KPIS,
+    compute_kpis,
+)
 from .ids import Ids
 
 
 def render(source: pl.LazyFrame) -> dmc.Card:
     """Render the active members card"""
 
-    try:
-        active_yesterday = (
-            source.filter(
-                pl.col("date")
-                == pl.lit(datetime.date.today() - datetime.timedelta(days=1))
-            )
-            .select(pl.col("total_active_count"))
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-    except ValueError:
-        active_yesterday = (
-            source.filter(pl.col("total_active_count") != 0)
-            .select(pl.col("total_active_count").first())
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
+    kpis = compute_kpis(source, ACTIVE_MEMBER_KPIS)
 
-    try:
-        active_two_days_ago = (
-            source.filter(
-                pl.col("date")
-                == pl.lit(datetime.date.today() - datetime.timedelta(days=2))
-            )
-            .select(pl.col("total_active_count"))
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-        if active_two_days_ago == 0:
-            raise ValueError
-    except ValueError:
-        active_two_days_ago = (
-            source.filter(pl.col("total_active_count") != 0)
-            .select(pl.col("total_active_count").limit(2).last())
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-
-    try:
-        active_month_ago = (
-            source.filter(
-                pl.col("date")
-                == pl.lit(datetime.date.today() - datetime.timedelta(days=30))
-            )
-            .select(pl.col("total_active_count"))
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-        if active_month_ago == 0:
-            raise ValueError
-    except ValueError:
-        active_month_ago = (
-            source.filter(pl.col("total_active_count") != 0)
-            .select(pl.col("total_active_count").limit(30).last())
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-
-    try:
-        active_year_ago = (
-            source.filter(
-                pl.col("date")
-                == pl.lit(datetime.date.today() - datetime.timedelta(days=365))
-            )
-            .select(pl.col("total_active_count"))
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
-        if active_year_ago == 0:
-            raise ValueError
-    except ValueError:
-        active_year_ago = (
-            source.filter(pl.col("total_active_count") != 0)
-            .select(pl.col("total_active_count").limit(365).last())
-            .collect()
-            .get_column("total_active_count")
-            .item()
-        )
+    active_yesterday = kpis["active_yesterday"]
+    active_two_days_ago = kpis["active_two_days_ago"]
+    active_month_ago = kpis["active_month_ago"]
+    active_year_ago = kpis["active_year_ago"]
 
     mom_change_percent = ((active_yesterday / active_month_ago) - 1) * 100
     yoy_change_percent = ((active_yesterday / active_year_ago) - 1) * 100
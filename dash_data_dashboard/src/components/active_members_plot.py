@@ -1,13 +1,21 @@
 import datetime
 import plotly.express as px
+import plotly.graph_objects as go
 import dash_mantine_components as dmc
 import polars as pl
-from dash import dcc, html
+from dash import dcc, html, Input, Output, callback
+from dash_data_dashboard.src.data.dash_data.downsample import downsample, visible_range
+from dash_data_dashboard.src.data.dash_data.membership_cache import (
+    get_membership_data,
+)
 from .ids import Ids
 
 
-def render(source: pl.LazyFrame) -> dmc.Card:
-    """Render the active members plot"""
+def create_figure(
+    source: pl.LazyFrame,
+    x_range: tuple[datetime.date, datetime.date] | None = None,
+) -> go.Figure:
+    """Plot active members, downsampled to the visible date range"""
 
     data = (
         source.filter(
@@ -15,25 +23,24 @@ def render(source: pl.LazyFrame) -> dmc.Card:
         )
         .sort(by="date")
         .select(
-            pl.col("total_active_count").alias("count"),
             pl.col("date"),
+            pl.col("total_active_count").alias("count"),
         )
+        .collect()
     )
 
-    serialized_dates = (
-        data.select((pl.col("date").dt.epoch("d")).alias("x")).collect().to_series()
-    )
-
-    dates = data.select("date").collect().to_series()
+    dates = data.get_column("date")
 
     date_range = [
         dates.min() - datetime.timedelta(days=5),
         dates.max() + datetime.timedelta(days=5),
     ]
 
+    points = downsample(data, x_range)["count"]
+
     fig = px.line(
-        x=dates,
-        y=data.select("count").collect().to_series(),
+        x=points.get_column("date"),
+        y=points.get_column("count"),
         labels={
             "x": "Date",
             "y": "Active Paying Members",
@@ -43,7 +50,8 @@ def render(source: pl.LazyFrame) -> dmc.Card:
 
     fig.update_traces(line_color="#1f77b4")
 
-    fig.update_layout(plot_bgcolor="white")
+    # Keep the user's zoom when the figure is redrawn for a new range
+    fig.update_layout(plot_bgcolor="white", uirevision=Ids.ACTIVE_MEMBERS_PLOT)
 
     fig.update_xaxes(
         rangeslider_visible=True,
@@ -68,6 +76,12 @@ def render(source: pl.LazyFrame) -> dmc.Card:
 
     fig.update_yaxes(gridcolor="lightgrey", autorange=True, fixedrange=False)
 
+    return fig
+
+
+def render(source: pl.LazyFrame) -> dmc.Card:
+    """Render the active members plot"""
+
     return dmc.Card(
         radius="md",
         shadow="md",
@@ -88,8 +102,19 @@ def render(source: pl.LazyFrame) -> dmc.Card:
                             dmc.Divider(mb=15),
                         ],
                     ),
-                    dcc.Graph(id=Ids.ACTIVE_MEMBERS_PLOT, figure=fig),
+                    dcc.Graph(id=Ids.ACTIVE_MEMBERS_PLOT, figure=create_figure(source)),
                 ],
             ),
         ],
     )
+
+
+@callback(
+    Output(Ids.ACTIVE_MEMBERS_PLOT, "figure"),
+    Input(Ids.ACTIVE_MEMBERS_PLOT, "relayoutData"),
+    prevent_initial_call=True,
+)
+def update_active_members_plot(relayout_data: dict | None) -> go.Figure:
+    """Redraw the plot with more detail when zoomed in"""
+
+    return create_figure(get_membership_data(), visible_range(relayout_data))
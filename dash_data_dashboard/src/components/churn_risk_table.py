@@ -4,7 +4,9 @@ import math
 import polars as pl
 from dash import html, dash_table, Input, Output, callback
 import dash_mantine_components as dmc
-from engine import raw_uri
+from sqlalchemy import String, cast, false, func, literal_column, or_, select, true
+from dash_data_dashboard.src.data.database import read_frame
+from schema import Member
 from .ids import Ids
 from . import (
     churn_table_sort_direction,
@@ -14,7 +16,6 @@ from . import (
     churn_table_submit,
 )
 
-
 PAGE_SIZE = 15
 
 
@@ -100,29 +101,68 @@ def update_churn_table(
     search: str,
 ) -> html.Div:
 
-    search = search.lower()
+    search = (search or "").strip().lower()
 
     sort_mapping = {
-        "Name": "first_name",
-        "Email Address": "email",
-        "Neon ID": "neon_id",
-        "Churn Risk": "risk_score",
-        "Emailed": "emailed",
+        "Name": Member.first_name,
+        "Email Address": Member.email,
+        "Neon ID": Member.neon_id,
+        "Churn Risk": Member.risk_score,
+        "Emailed": Member.emailed,
     }
 
-    query = f"""
-    SELECT neon_id, first_name, last_name, email, risk_score, emailed, last_emailed
-    FROM member
-    WHERE active = true {"AND emailed = false" if not show_emailed else ""}
-    ORDER BY {sort_mapping.get(sort_by, "risk_score")} {sort_dir.upper()}
-    """
+    sort_col = sort_mapping.get(sort_by, Member.risk_score)
+
+    conditions = [Member.active == true()]
 
-    uri = raw_uri
+    if not show_emailed:
+        conditions.append(Member.emailed == false())
+
+    if search:
+        # Matches the expression of the ix_member_full_name_trgm index
+        full_name = func.lower(
+            Member.first_name + literal_column("' '") + Member.last_name
+        )
+        conditions.append(
+            or_(
+                full_name.contains(search, autoescape=True),
+                func.lower(Member.email).contains(search, autoescape=True),
+                cast(Member.neon_id, String).contains(search, autoescape=True),
+            )
+        )
+
+    query = (
+        select(
+            Member.neon_id,
+            Member.first_name,
+            Member.last_name,
+            Member.email,
+            Member.risk_score,
+            Member.emailed,
+            Member.last_emailed,
+            func.count().over().label("total"),
+        )
+        .where(*conditions)
+        # neon_id breaks ties, so rows keep their order from one page query to the next
+        .order_by(
+            sort_col.asc() if sort_dir == "asc" else sort_col.desc(), Member.neon_id
+        )
+        .offset(page_current * page_size)
+        .limit(page_size)
+    )
 
-    result_df = (
-        pl.read_database_uri(query, uri)
-        .lazy()
-        .select(
+    paged_df = read_frame(query)
+
+    if paged_df.is_empty():
+        data = []
+        items = 0
+        if page_current > 0:
+            items = read_frame(
+                select(func.count().label("total")).where(*conditions)
+            ).item()
+    else:
+        items = paged_df.get_column("total").item(0)
+        data = paged_df.select(
             (
                 pl.format(
                     "[{}](https://asmbly.app.neoncrm.com/admin/accounts/{}/about)",
@@ -140,19 +180,7 @@ def update_churn_table(
             .otherwise(pl.lit("No"))
             .alias("Emailed"),
             pl.col("last_emailed").alias("Last Emailed"),
-        )
-        .filter(
-            pl.col("Name").str.to_lowercase().str.contains(search, literal=True)
-            | pl.col("Email Address").str.contains(search, literal=True)
-            | pl.col("Neon ID").str.contains(search, literal=True)
-        )
-    )
-
-    paged_df = result_df.slice(
-        offset=page_current * page_size, length=page_size
-    ).collect()
-
-    data = paged_df.to_dicts()
+        ).to_dicts()
 
     cols = [
         {
@@ -163,10 +191,7 @@ def update_churn_table(
     ]
 
     middle_cols = [
-        {"name": i, "id": i}
-        for i in paged_df.select(
-            pl.all().exclude(["Emailed", "Last Emailed", "Neon ID"])
-        ).columns
+        {"name": i, "id": i} for i in ["Name", "Email Address", "Churn Risk"]
     ]
 
     append = [
@@ -191,7 +216,6 @@ def update_churn_table(
     for col in middle_cols, append:
         cols.extend(col)
 
-    items = result_df.select(pl.count()).collect().item()
     page_count = 1 if items == 0 else math.ceil(items / PAGE_SIZE)
 
     return data, cols, page_count
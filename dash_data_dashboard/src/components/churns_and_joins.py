@@ -1,35 +1,18 @@
-import datetime
 import polars as pl
 import dash_mantine_components as dmc
+from dash_data_dashboard.src.data.dash_data.kpis import DAILY_CHANGE_KPIS, compute_kpis
 
 
 def render(source: pl.LazyFrame) -> dmc.Card:
     """Render the churns and joins card"""
 
-    today = (
-        source.filter(
-            pl.col("date") == pl.lit(datetime.date.today() - datetime.timedelta(days=1))
-        )
-        .select(
-            pl.col("member_signups_count"),
-            pl.col("churn_count"),
-            pl.col("acct_signups_count"),
-        )
-        .collect()
-    )
-
-    if today.is_empty():
-        today = source.select(
-            pl.col("member_signups_count").first(),
-            pl.col("churn_count").first(),
-            pl.col("acct_signups_count").first(),
-        ).collect()
+    today = compute_kpis(source, DAILY_CHANGE_KPIS)
 
-    mem_signups = today.get_column("member_signups_count").item()
+    mem_signups = today["member_signups_count"]
 
-    churns = today.get_column("churn_count").item()
+    churns = today["churn_count"]
 
-    acct_signups = today.get_column("acct_signups_count").item()
+    acct_signups = today["acct_signups_count"]
 
     return dmc.Card(
         withBorder=True,
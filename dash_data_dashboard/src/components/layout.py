@@ -2,8 +2,9 @@
 
 from dash import html
 import dash_mantine_components as dmc
-from dash_data_dashboard.src.data.dash_data.loader import load_membership_data
-from engine import raw_uri
+from dash_data_dashboard.src.data.dash_data.membership_cache import (
+    get_membership_data,
+)
 from . import (
     churn_risk_table,
     header,
@@ -17,9 +18,9 @@ from .breakpoints import Breakpoint as bp
 
 
 def create_layout() -> html.Div:
-    """Create the layout of the dashboard"""
+    """Create the layout of the dashboard, called on every page load"""
 
-    source = load_membership_data(raw_uri)
+    source = get_membership_data()
 
     return dmc.MantineProvider(
         theme={
@@ -66,7 +67,7 @@ def create_layout() -> html.Div:
                             ),
                             dmc.Col(
                                 span=12,
-                                children=[churns_and_joins_plot.render(source)],
+                                children=[churns_and_joins_plot.render()],
                             ),
                             dmc.Col(
                                 span=6,
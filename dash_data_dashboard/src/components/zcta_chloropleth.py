@@ -1,11 +1,12 @@
 """Generate a chloropleth map of member locations based on ZCTA (Zip Code Tabulation Area)"""
 
-import json
-import polars as pl
 import plotly.express as px
 from dash import dcc, Input, Output, callback
 import dash_mantine_components as dmc
-from engine import raw_uri
+from sqlalchemy import select, func
+from dash_data_dashboard.src.data.database import read_frame
+from schema import MemberZipCount
+from dash_data_dashboard.src.data.geojson_store import get_zcta_geojson
 from .ids import Ids
 from . import zcta_multiselect
 
@@ -37,56 +38,33 @@ def render() -> dmc.Card:
 def update_chloropleth(mutliselect: list[str] | None) -> px.choropleth_mapbox:
     """Update the chloropleth map based on the clickData"""
 
-    active = "active" in mutliselect
-    inactive = "inactive" in mutliselect
-    # never_joined = "never_joined" in mutliselect
+    active_values = []
 
-    query = """
-        SELECT zip_code, active, membership_duration
-        FROM member
-        """
+    if "active" in mutliselect:
+        active_values.append(True)
 
-    zip_codes = pl.read_database_uri(query, raw_uri).lazy()
+    if "inactive" in mutliselect:
+        active_values.append(False)
 
-    with open(
-        "./dash_data_dashboard/src/data/tx_zip_codes_geo_min.json",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        geojson = json.load(f)
+    # "never_joined" would be MemberZipCount.duration_bucket == 0
 
-    zips_list = []
-
-    if active:
-        active_zips = zip_codes.filter(
-            (pl.col("active") == True) & (pl.col("membership_duration") > 0)
-        )
-
-        zips_list.append(active_zips)
-
-    if inactive:
-        inactive_zips = zip_codes.filter(
-            (pl.col("active") == False) & (pl.col("membership_duration") > 0)
+    if active_values:
+        query = (
+            select(
+                MemberZipCount.zip_code.label("Zip Code"),
+                func.sum(MemberZipCount.count).label("count"),
+            )
+            .where(
+                MemberZipCount.active.in_(active_values),
+                MemberZipCount.duration_bucket > 0,
+            )
+            .group_by(MemberZipCount.zip_code)
         )
 
-        zips_list.append(inactive_zips)
+        zips = read_frame(query).to_dicts()
 
-    # if never_joined:
-    #     never_joined_zips = zip_codes.filter(
-    #         (pl.col("active") == False) & (pl.col("membership_duration") == 0)
-    #     )
-
-    #     zips_list.append(never_joined_zips)
-
-    if zips_list:
-        zips = (
-            pl.concat(zips_list, how="vertical")
-            .groupby("zip_code")
-            .agg(pl.col("zip_code").count().alias("count"))
-            .select(pl.col("zip_code").alias("Zip Code"), pl.col("count"))
-            .collect()
-            .to_dicts()
-        )
+        # Only send the boundaries of zip codes that are actually shaded
+        geojson = get_zcta_geojson([row["Zip Code"] for row in zips])
 
         fig = px.choropleth_mapbox(
             zips,
@@ -104,7 +82,7 @@ def update_chloropleth(mutliselect: list[str] | None) -> px.choropleth_mapbox:
         )
     else:
         fig = px.choropleth_mapbox(
-            geojson=geojson,
+            geojson=get_zcta_geojson([]),
             featureidkey="properties.ZCTA5CE10",
             color_continuous_scale="viridis",
             zoom=8,
@@ -0,0 +1,141 @@
+"""
+Downsampling of daily time series before they are sent to the browser
+"""
+
+import datetime
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+# Most points drawn per trace, enough for a line to look exact at dashboard widths
+MAX_POINTS = 500
+
+
+def visible_range(
+    relayout_data: dict[str, Any] | None,
+) -> tuple[datetime.date, datetime.date] | None:
+    """
+    The x axis range a graph was zoomed or panned to, from its relayoutData, or None when
+    the whole series is shown.
+    """
+
+    if not relayout_data:
+        return None
+
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        bounds = [relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]]
+    elif "xaxis.range" in relayout_data:
+        # Sent when the range slider is dragged
+        bounds = relayout_data["xaxis.range"]
+    else:
+        return None
+
+    start, end = (datetime.date.fromisoformat(str(b)[:10]) for b in bounds)
+
+    return start, end
+
+
+def resample_period(start: datetime.date, end: datetime.date) -> str | None:
+    """Bucket size for a date range, None to keep daily points."""
+
+    days = (end - start).days
+
+    if days > 3 * 365:
+        return "1mo"
+    if days > 365:
+        return "1w"
+    return None
+
+
+def resample(df: pl.DataFrame, every: str) -> pl.DataFrame:
+    """Average every column of a frame sorted by date over buckets of the given size."""
+
+    if df.is_empty():
+        return df
+
+    return df.group_by_dynamic("date", every=every).agg(pl.exclude("date").mean())
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets, which picks the point
+    in each bucket forming the largest triangle with its neighbours so peaks survive.
+    """
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    previous = 0
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+
+        previous = start + int(area.argmax())
+        indices[i + 1] = previous
+
+    return indices
+
+
+def downsample(
+    df: pl.DataFrame,
+    x_range: tuple[datetime.date, datetime.date] | None = None,
+    max_points: int = MAX_POINTS,
+) -> dict[str, pl.DataFrame]:
+    """
+    Reduce every value column of a frame sorted by date to at most about max_points rows.
+
+    The visible range is resampled to weekly or monthly buckets when it spans years, then
+    reduced with LTTB. Rows outside the visible range are kept as monthly averages so the
+    range slider still shows the whole history.
+
+    Returns a date and value frame per column, since LTTB keeps different rows for each.
+    """
+
+    if x_range is None:
+        start, end = df.get_column("date").min(), df.get_column("date").max()
+        visible, outside = df, df.clear()
+    else:
+        start, end = x_range
+        in_range = pl.col("date").is_between(start, end)
+        visible, outside = df.filter(in_range), df.filter(~in_range)
+
+    if start is not None and (every := resample_period(start, end)):
+        visible = resample(visible, every)
+
+    outside = resample(outside, "1mo")
+
+    series = {}
+
+    for column in df.columns:
+        if column == "date":
+            continue
+
+        points = visible.select("date", column).drop_nulls()
+
+        if len(points) > max_points:
+            x = points.get_column("date").dt.epoch("d").to_numpy().astype(np.float64)
+            y = points.get_column(column).to_numpy().astype(np.float64)
+            points = points[lttb(x, y, max_points)]
+
+        series[column] = pl.concat(
+            [points, outside.select("date", column).drop_nulls()],
+            how="vertical_relaxed",
+        ).sort("date")
+
+    return series
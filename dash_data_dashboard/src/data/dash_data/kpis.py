@@ -0,0 +1,78 @@
+"""
+KPIs computed from the membership_count series
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Any
+
+import polars as pl
+
+
+@dataclass(frozen=True)
+class Kpi:
+    """
+    The value of a membership_count column on the day days_ago before today.
+
+    When there is no row for that day (or the row is 0 and zero_is_missing), the value of
+    the fallback_row'th row counting back from the latest is used instead, skipping zeros
+    when fallback_nonzero is set.
+    """
+
+    column: str
+    days_ago: int
+    fallback_row: int = 1
+    zero_is_missing: bool = False
+    fallback_nonzero: bool = True
+
+    def expr(self, today: datetime.date) -> pl.Expr:
+        target = today - datetime.timedelta(days=self.days_ago)
+        col = pl.col(self.column)
+
+        exact = col.filter(pl.col("date") == pl.lit(target)).first()
+        found = exact.is_not_null()
+        if self.zero_is_missing:
+            found = found & (exact != 0)
+
+        candidates = col.filter(col != 0) if self.fallback_nonzero else col
+        fallback = candidates.head(self.fallback_row).last()
+
+        return pl.when(found).then(exact).otherwise(fallback)
+
+
+ACTIVE_MEMBER_KPIS = {
+    "active_yesterday": Kpi("total_active_count", days_ago=1),
+    "active_two_days_ago": Kpi(
+        "total_active_count", days_ago=2, fallback_row=2, zero_is_missing=True
+    ),
+    "active_month_ago": Kpi(
+        "total_active_count", days_ago=30, fallback_row=30, zero_is_missing=True
+    ),
+    "active_year_ago": Kpi(
+        "total_active_count", days_ago=365, fallback_row=365, zero_is_missing=True
+    ),
+}
+
+DAILY_CHANGE_KPIS = {
+    column: Kpi(column, days_ago=1, fallback_nonzero=False)
+    for column in ("member_signups_count", "churn_count", "acct_signups_count")
+}
+
+
+def compute_kpis(
+    source: pl.LazyFrame,
+    kpis: dict[str, Kpi],
+    today: datetime.date | None = None,
+) -> dict[str, Any]:
+    """
+    Compute every KPI with a single scan of source, which must be sorted newest first as
+    load_membership_data returns it.
+    """
+
+    today = today or datetime.date.today()
+
+    return (
+        source.select(kpi.expr(today).alias(name) for name, kpi in kpis.items())
+        .collect()
+        .row(0, named=True)
+    )
@@ -3,6 +3,7 @@ Data loading functions
 """
 
 import polars as pl
+from dash_data_dashboard.src.data.database import read_frame
 
 
 def load_churn_data(path: str) -> pl.LazyFrame:
@@ -22,7 +23,7 @@ def load_churn_data(path: str) -> pl.LazyFrame:
     return q
 
 
-def load_membership_data(db_uri: str) -> pl.LazyFrame:
+def load_membership_data() -> pl.LazyFrame:
     """Load data from database"""
 
     query = """
@@ -31,6 +32,34 @@ def load_membership_data(db_uri: str) -> pl.LazyFrame:
         ORDER BY date DESC
     """
 
-    lf = pl.read_database_uri(query, db_uri).lazy()
+    lf = read_frame(query).lazy()
+
+    return lf
+
+
+ROLLING_COLUMNS = ("churn_count", "member_signups_count", "acct_signups_count")
+ROLLING_PERIODS = ("7d", "14d", "30d", "90d")
+
+
+def rolling_column(column: str, period: str) -> str:
+    """Name of the precomputed rolling mean of column over period, e.g. churn_count_7d"""
+
+    return f"{column}_{period}"
+
+
+def with_rolling_means(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Add the rolling means shown in the churns and joins plot for every period in
+    ROLLING_PERIODS, keeping the original row order.
+    """
+
+    by_date = lf.sort(by="date")
+
+    for period in ROLLING_PERIODS:
+        means = by_date.rolling("date", period=period, closed="none").agg(
+            pl.col(column).mean().alias(rolling_column(column, period))
+            for column in ROLLING_COLUMNS
+        )
+        lf = lf.join(means, on="date", how="left")
 
     return lf
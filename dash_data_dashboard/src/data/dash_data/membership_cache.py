@@ -0,0 +1,112 @@
+"""
+Shared cache of the membership_count series
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+
+import polars as pl
+import redis
+from sqlalchemy import select, func
+
+from engine import engine
+from schema import MembershipCount
+from .loader import load_membership_data, with_rolling_means
+
+REDIS_URL = os.environ.get("REDIS_URL")
+# Seconds between checks of the membership_count table for a new row
+MEMBERSHIP_CACHE_CHECK_INTERVAL = float(
+    os.environ.get("MEMBERSHIP_CACHE_CHECK_INTERVAL", 60)
+)
+# Bump when the cached frame changes shape so workers ignore frames from older releases
+CACHE_VERSION = 2
+# Stale versions in Redis expire on their own once the nightly job has moved on
+REDIS_CACHE_TTL = 60 * 60 * 48
+
+
+class MembershipCache:
+    """
+    Membership counts shared by every worker, keyed on the latest row of membership_count.
+
+    Each process keeps the frame in memory and checks the latest date (and row count, in
+    case a day is backfilled) at most once per check_interval. When the key changes the
+    frame is read from Redis as Arrow IPC if another worker already loaded it, and only
+    otherwise from Postgres, in which case the rolling means for the churns and joins plot
+    are computed once and cached alongside the counts.
+    """
+
+    def __init__(self, redis_url: str | None, check_interval: float):
+        self.check_interval = check_interval
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._lock = threading.Lock()
+        self._key: str | None = None
+        self._frame: pl.DataFrame | None = None
+        self._checked = 0.0
+
+    def _latest_key(self) -> str:
+        stmt = select(func.max(MembershipCount.date), func.count())
+
+        with engine.connect() as conn:
+            latest, count = conn.execute(stmt).one()
+
+        return f"membership_count:v{CACHE_VERSION}:{latest}:{count}"
+
+    def _read_redis(self, key: str) -> pl.DataFrame | None:
+        if self._redis is None:
+            return None
+
+        try:
+            data = self._redis.get(key)
+        except redis.RedisError as e:
+            logging.warning("Could not read %s from Redis: %r", key, e)
+            return None
+
+        return pl.read_ipc(io.BytesIO(data)) if data is not None else None
+
+    def _write_redis(self, key: str, frame: pl.DataFrame) -> None:
+        if self._redis is None:
+            return
+
+        buffer = io.BytesIO()
+        frame.write_ipc(buffer)
+
+        try:
+            self._redis.set(key, buffer.getvalue(), ex=REDIS_CACHE_TTL)
+        except redis.RedisError as e:
+            logging.warning("Could not write %s to Redis: %r", key, e)
+
+    def get(self) -> pl.DataFrame:
+        """Return the current membership counts, newest first."""
+
+        with self._lock:
+            if (
+                self._frame is not None
+                and time.monotonic() - self._checked < self.check_interval
+            ):
+                return self._frame
+
+            key = self._latest_key()
+            self._checked = time.monotonic()
+
+            if key != self._key or self._frame is None:
+                frame = self._read_redis(key)
+
+                if frame is None:
+                    frame = with_rolling_means(load_membership_data()).collect()
+                    self._write_redis(key, frame)
+
+                self._key = key
+                self._frame = frame
+
+            return self._frame
+
+
+membership_cache = MembershipCache(REDIS_URL, MEMBERSHIP_CACHE_CHECK_INTERVAL)
+
+
+def get_membership_data() -> pl.LazyFrame:
+    """Membership counts from the shared cache, as load_membership_data returns them."""
+    return membership_cache.get().lazy()
@@ -0,0 +1,15 @@
+"""
+Database reads for the dashboard
+"""
+
+import polars as pl
+from sqlalchemy import Executable
+
+from engine import engine
+
+
+def read_frame(query: str | Executable) -> pl.DataFrame:
+    """Run a query on a connection from the shared engine pool and return a DataFrame"""
+
+    with engine.connect() as conn:
+        return pl.read_database(query, conn)
@@ -0,0 +1,70 @@
+"""
+Process-wide store of Texas ZCTA (Zip Code Tabulation Area) boundaries for the member map
+"""
+
+import functools
+import json
+
+GEOJSON_PATH = "./dash_data_dashboard/src/data/tx_zip_codes_geo_min.json"
+
+# ~10m of precision, far finer than a zip code boundary drawn at city zoom
+COORDINATE_PRECISION = 4
+
+
+def _simplify_ring(ring: list[list[float]]) -> list[list[float]]:
+    """Round the coordinates of a ring and drop points that become duplicates."""
+    simplified = []
+
+    for lon, lat in ring:
+        point = [round(lon, COORDINATE_PRECISION), round(lat, COORDINATE_PRECISION)]
+        if not simplified or point != simplified[-1]:
+            simplified.append(point)
+
+    return simplified
+
+
+def _simplify_geometry(geometry: dict) -> dict:
+    if geometry["type"] == "Polygon":
+        coordinates = [_simplify_ring(ring) for ring in geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        coordinates = [
+            [_simplify_ring(ring) for ring in polygon]
+            for polygon in geometry["coordinates"]
+        ]
+    else:
+        coordinates = geometry["coordinates"]
+
+    return {"type": geometry["type"], "coordinates": coordinates}
+
+
+@functools.cache
+def load_zcta_features() -> dict[str, dict]:
+    """Load the ZCTA boundaries once per process, keyed by zip code."""
+
+    with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    return {
+        feature["properties"]["ZCTA5CE10"]: {
+            "type": "Feature",
+            "id": feature["properties"]["ZCTA5CE10"],
+            "properties": feature["properties"],
+            "geometry": _simplify_geometry(feature["geometry"]),
+        }
+        for feature in geojson["features"]
+    }
+
+
+def get_zcta_geojson(zip_codes: list[int | str]) -> dict:
+    """Build a FeatureCollection with only the boundaries of the given zip codes."""
+
+    features = load_zcta_features()
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            features[str(zip_code)]
+            for zip_code in dict.fromkeys(zip_codes)
+            if str(zip_code) in features
+        ],
+    }
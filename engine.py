@@ -5,6 +5,15 @@ from sqlalchemy import create_engine
 
 postgres_port = os.environ.get("POSTGRES_PORT")
 
+# Log every SQL statement, for debugging only
+SQL_ECHO = os.environ.get("SQL_ECHO", "false").lower() == "true"
+# Connections kept open per process (each gunicorn worker has its own pool)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+# Extra connections opened under load and closed when returned
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+# Seconds before a pooled connection is replaced
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
 with open(os.environ["POSTGRES_USER_FILE"], "r", encoding="utf-8") as f:
     postgres_user = f.read().strip()
 
@@ -20,5 +29,9 @@ raw_uri = connection_uri.replace("postgresql+psycopg", "postgresql")
 
 engine = create_engine(
     connection_uri,
-    echo=True,
+    echo=SQL_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
 )
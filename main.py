@@ -42,7 +42,8 @@ auth.register_provider(
 )
 
 app.title = APP_TITLE
-app.layout = create_layout()
+# Build the layout per page load so it always shows the latest membership counts
+app.layout = create_layout
 
 server = app.server
 
@@ -5,8 +5,9 @@
 from typing import List
 from typing import Optional
 import datetime
-from sqlalchemy import ForeignKey, sql
-from sqlalchemy import String, Date
+from sqlalchemy import ForeignKey, sql, func, event
+from sqlalchemy import String, Date, Index, DDL, literal_column
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import (
     DeclarativeBase,
     MappedAsDataclass,
@@ -35,6 +36,38 @@ class Member(Base):
     emailed: Mapped[bool] = mapped_column(server_default=sql.false())
     last_emailed: Mapped[Optional[datetime.date]] = mapped_column(Date)
     active: Mapped[bool] = mapped_column(server_default=sql.true())
+    # Change detection for the nightly risk update
+    neon_last_modified: Mapped[Optional[str]] = mapped_column(String(32))
+    input_fingerprint: Mapped[Optional[str]] = mapped_column(String(64))
+
+
+# Trigram indexes for the substring search of the churn risk table
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+Index(
+    "ix_member_full_name_trgm",
+    func.lower(Member.first_name + literal_column("' '") + Member.last_name).label(
+        "full_name"
+    ),
+    postgresql_using="gin",
+    postgresql_ops={"full_name": "gin_trgm_ops"},
+)
+
+Index(
+    "ix_member_email_trgm",
+    func.lower(Member.email).label("email_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"email_lower": "gin_trgm_ops"},
+)
+
+Index(
+    "ix_member_active_emailed_risk_score",
+    Member.active,
+    Member.emailed,
+    Member.risk_score,
+)
 
 
 class MembershipCount(Base):
@@ -48,11 +81,42 @@ class MembershipCount(Base):
     date: Mapped[datetime.date] = mapped_column(Date, unique=True)
 
 
+class MemberZipCount(Base):
+    """Member counts per zip code, refreshed from the member table by the cron service"""
+
+    __tablename__ = "member_zip_count"
+
+    zip_code: Mapped[int] = mapped_column(primary_key=True)
+    active: Mapped[bool] = mapped_column(primary_key=True)
+    # Lower bound of the membership duration bucket in months, 0 for never joined
+    duration_bucket: Mapped[int] = mapped_column(primary_key=True)
+    count: Mapped[int]
+
+
+class DriveTime(Base):
+    __tablename__ = "drive_time"
+
+    address: Mapped[str] = mapped_column(String(255), primary_key=True)
+    distance: Mapped[Optional[float]]
+    time: Mapped[Optional[float]]
+    updated_on: Mapped[datetime.date] = mapped_column(Date)
+
+
+class Geocode(Base):
+    __tablename__ = "geocode"
+
+    address: Mapped[str] = mapped_column(String(255), primary_key=True)
+    lat: Mapped[float]
+    lng: Mapped[float]
+    updated_on: Mapped[datetime.date] = mapped_column(Date)
+
+
 class EventType(Base):
     __tablename__ = "event_type"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True)
+    category: Mapped[Optional[str]] = mapped_column(String(55))
 
     instances: Mapped[List["EventInstance"]] = relationship(back_populates="event_type")
 
@@ -60,11 +124,45 @@ class EventType(Base):
 class EventInstance(Base):
     __tablename__ = "event_instance"
 
+    # Neon event ID
     id: Mapped[int] = mapped_column(primary_key=True)
     event_type_id: Mapped[int] = mapped_column(ForeignKey("event_type.id"))
     date: Mapped[datetime.date] = mapped_column(Date)
     event_type: Mapped["EventType"] = relationship(back_populates="instances")
+    # Day the event's registrations were last read into event_registration
+    registrations_synced_on: Mapped[Optional[datetime.date]] = mapped_column(Date)
+
+
+class EventRegistration(Base):
+    """Successful event registrations, kept by the cron service between runs"""
+
+    __tablename__ = "event_registration"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    event_id: Mapped[int] = mapped_column(ForeignKey("event_instance.id"), index=True)
+    # Neon ID of the registrant account
+    neon_id: Mapped[int]
+    registered_at: Mapped[str] = mapped_column(String(32))
+    registration_amount: Mapped[float]
+
+
+# Columns added to tables deployed databases already have, which create_all leaves alone
+COLUMN_UPGRADES = [
+    "ALTER TABLE member ADD COLUMN IF NOT EXISTS neon_last_modified VARCHAR(32)",
+    "ALTER TABLE member ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(64)",
+    "ALTER TABLE event_type ADD COLUMN IF NOT EXISTS category VARCHAR(55)",
+    "ALTER TABLE event_instance ADD COLUMN IF NOT EXISTS registrations_synced_on DATE",
+]
 
 
 if __name__ == "__main__":
     Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        for ddl in COLUMN_UPGRADES:
+            conn.exec_driver_sql(ddl)
+
+        # create_all skips the indexes of tables that already exist too
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
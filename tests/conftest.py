@@ -0,0 +1,27 @@
+"""Make the cron service modules importable from the tests"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The cron service runs from its own directory and imports helpers as a top level package
+sys.path.insert(0, str(ROOT / "cron_service"))
+sys.path.insert(0, str(ROOT))
+
+# engine.py reads the Postgres settings on import, nothing connects during the tests
+os.environ.setdefault("POSTGRES_PORT", "5432")
+secrets_dir = tempfile.mkdtemp()
+for name in ("POSTGRES_USER_FILE", "POSTGRES_PASSWORD_FILE", "POSTGRES_DB_FILE"):
+    if name not in os.environ:
+        path = Path(secrets_dir) / name.lower()
+        path.write_text("test", encoding="utf-8")
+        os.environ[name] = str(path)
+
+# Placeholder Neon credentials, requests in the tests only go to the fake Neon server
+os.environ.setdefault("NEON_API_KEY", "test")
+os.environ.setdefault("NEON_USER", "test")
+# Keep the shared rate limiter from dominating test run time
+os.environ.setdefault("NEON_MAX_REQUESTS_PER_SECOND", "1000")
@@ -0,0 +1,47 @@
+"""The history sync's date windows cover every date exactly once"""
+
+import datetime
+
+import pytest
+
+from helpers.account_history import date_windows
+
+OPERATORS = {
+    "GREATER_AND_EQUAL": lambda value, bound: value >= bound,
+    "LESS_THAN": lambda value, bound: value < bound,
+}
+
+
+def in_window(date: datetime.date, window: list[dict]) -> bool:
+    return all(OPERATORS[f["operator"]](date.isoformat(), f["value"]) for f in window)
+
+
+def windows_matching(date: datetime.date, windows: list[list[dict]]) -> int:
+    return sum(in_window(date, window) for window in windows)
+
+
+def every_day(start: datetime.date, end: datetime.date):
+    while start <= end:
+        yield start
+        start += datetime.timedelta(days=1)
+
+
+@pytest.mark.parametrize("days", [30, 365])
+def test_no_start_date_covers_all_history(days: int) -> None:
+    windows = date_windows(
+        "Membership Start Date", None, days, datetime.date(2018, 1, 1)
+    )
+    today = datetime.date.today()
+
+    for date in every_day(datetime.date(2000, 1, 1), today + datetime.timedelta(400)):
+        assert windows_matching(date, windows) == 1, date
+
+
+@pytest.mark.parametrize("days", [30, 365])
+def test_start_date_covers_history_since(days: int) -> None:
+    start = datetime.date(2020, 3, 15)
+    windows = date_windows("Donation Date", start, days)
+    today = datetime.date.today()
+
+    for date in every_day(datetime.date(2019, 1, 1), today + datetime.timedelta(400)):
+        assert windows_matching(date, windows) == (date >= start), date
@@ -0,0 +1,134 @@
+"""LTTB, the visible range of a graph and the downsampling built on them"""
+
+import datetime
+
+import numpy as np
+import polars as pl
+import pytest
+
+from dash_data_dashboard.src.data.dash_data.downsample import (
+    downsample,
+    lttb,
+    visible_range,
+)
+
+
+def reference_lttb(x: list[float], y: list[float], n_out: int) -> list[int]:
+    """Point by point LTTB over the same buckets"""
+    n = len(x)
+    edges = [int(e) for e in np.linspace(1, n - 1, n_out - 1)]
+    kept = [0]
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = sum(x[end:next_end]) / (next_end - end)
+        next_y = sum(y[end:next_end]) / (next_end - end)
+        a = kept[-1]
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (x[a] - next_x) * (y[j] - y[a]) - (x[a] - x[j]) * (next_y - y[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+
+    kept.append(n - 1)
+
+    return kept
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1000, 3), (731, 500), (50, 7)])
+def test_lttb_matches_reference(n: int, n_out: int) -> None:
+    rng = np.random.default_rng(n + n_out)
+    x = np.arange(n, dtype=np.float64)
+    y = rng.normal(size=n).cumsum()
+
+    indices = lttb(x, y, n_out)
+
+    assert indices.tolist() == reference_lttb(x.tolist(), y.tolist(), n_out)
+    assert len(indices) == n_out
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_keeps_a_spike() -> None:
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[617] = 50
+
+    assert 617 in lttb(x, y, 20)
+
+
+@pytest.mark.parametrize("n_out", [10, 11, 2])
+def test_lttb_keeps_everything_when_short(n_out: int) -> None:
+    x = np.arange(10, dtype=np.float64)
+
+    assert lttb(x, x, n_out).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize(
+    "relayout_data, expected",
+    [
+        (None, None),
+        ({}, None),
+        ({"xaxis.autorange": True}, None),
+        ({"autosize": True}, None),
+        ({"yaxis.range[0]": 0, "yaxis.range[1]": 10}, None),
+        (
+            {"xaxis.range[0]": "2023-01-05", "xaxis.range[1]": "2023-03-01"},
+            (datetime.date(2023, 1, 5), datetime.date(2023, 3, 1)),
+        ),
+        (
+            {
+                "xaxis.range[0]": "2022-12-31 18:43:12.5",
+                "xaxis.range[1]": "2023-02-14 07:00",
+            },
+            (datetime.date(2022, 12, 31), datetime.date(2023, 2, 14)),
+        ),
+        (
+            {"xaxis.range": ["2021-06-01 00:00:00", "2024-01-01 12:00:00"]},
+            (datetime.date(2021, 6, 1), datetime.date(2024, 1, 1)),
+        ),
+    ],
+)
+def test_visible_range(relayout_data, expected) -> None:
+    assert visible_range(relayout_data) == expected
+
+
+def daily_series(days: int) -> pl.DataFrame:
+    rng = np.random.default_rng(days)
+    return pl.DataFrame(
+        {
+            "date": pl.date_range(
+                datetime.date(2018, 1, 1),
+                datetime.date(2018, 1, 1) + datetime.timedelta(days=days - 1),
+                eager=True,
+            ),
+            "count": rng.integers(0, 500, days),
+        }
+    )
+
+
+def test_downsample_whole_series() -> None:
+    df = daily_series(6 * 365)
+
+    points = downsample(df, max_points=50)["count"]
+
+    assert len(points) <= 50
+    assert points.get_column("date").is_sorted()
+
+
+def test_downsample_keeps_daily_points_in_a_short_range() -> None:
+    df = daily_series(6 * 365)
+    start, end = datetime.date(2020, 3, 1), datetime.date(2020, 4, 30)
+
+    points = downsample(df, (start, end))["count"]
+    visible = points.filter(pl.col("date").is_between(start, end))
+    outside = points.filter(~pl.col("date").is_between(start, end))
+
+    assert visible.equals(df.filter(pl.col("date").is_between(start, end)))
+    # One average per month outside the range
+    assert len(outside) <= 6 * 12 + 1
+    assert points.get_column("date").is_sorted()
@@ -0,0 +1,145 @@
+"""Churn and join counts match the per-account map_elements implementation they replaced"""
+
+import datetime
+import random
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from membership_counts_seed import load_churns, load_joins
+
+
+def find_churn_dates(struct: list[dict[str, datetime.date]]) -> list[datetime.date]:
+    mem_start_dates = [s["start_date"] for s in struct]
+    mem_end_dates = [s["expired_on_date"] for s in struct]
+
+    churn_dates = []
+
+    for i in range(len(mem_start_dates) - 1):
+        if mem_start_dates[i + 1] - mem_end_dates[i] > datetime.timedelta(days=1):
+            churn_dates.append(mem_end_dates[i])
+
+    if mem_end_dates[-1] < datetime.date.today():
+        churn_dates.append(mem_end_dates[-1])
+
+    return churn_dates
+
+
+def find_join_dates(struct: list[dict[str, datetime.date]]) -> list[datetime.date]:
+    mem_start_dates = [s["start_date"] for s in struct]
+    mem_end_dates = [s["expired_on_date"] for s in struct]
+
+    join_dates = [mem_start_dates[0]]
+
+    for i in range(len(mem_start_dates) - 1):
+        if mem_start_dates[i + 1] - mem_end_dates[i] > datetime.timedelta(days=1):
+            join_dates.append(mem_start_dates[i + 1])
+
+    return join_dates
+
+
+def old_load_churns(memberships: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        memberships.sort(by="expired_on_date")
+        .group_by("neon_id")
+        .agg(
+            pl.struct(["start_date", "expired_on_date"])
+            .map_elements(find_churn_dates, return_dtype=pl.List(pl.Date))
+            .alias("churn_dates")
+        )
+        .explode("churn_dates")
+        .filter(pl.col("churn_dates").is_not_null())
+        .group_by("churn_dates")
+        .agg(pl.col("neon_id").count().alias("churn_count"))
+    )
+
+
+def old_load_joins(memberships: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        memberships.sort(by="start_date")
+        .group_by("neon_id")
+        .agg(
+            pl.struct(["start_date", "expired_on_date"])
+            .map_elements(find_join_dates, return_dtype=pl.List(pl.Date))
+            .alias("join_dates")
+        )
+        .explode("join_dates")
+        .filter(pl.col("join_dates").is_not_null())
+        .group_by("join_dates")
+        .agg(pl.col("neon_id").count().alias("member_signups_count"))
+    )
+
+
+def random_memberships(seed: int, accounts: int = 300) -> pl.LazyFrame:
+    """Back to back, lapsed and still running monthly or yearly memberships"""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    rows = []
+
+    for neon_id in range(accounts):
+        start = today - datetime.timedelta(days=rng.randint(30, 2000))
+        for _ in range(rng.randint(1, 8)):
+            end = start + datetime.timedelta(days=rng.choice([30, 31, 365]))
+            rows.append((neon_id, start, end))
+            # Renewed the next day, a day late, or after a lapse
+            start = end + datetime.timedelta(days=rng.choice([1, 1, 1, 2, 3, 45]))
+
+    rng.shuffle(rows)
+
+    return pl.LazyFrame(
+        rows, schema=["neon_id", "start_date", "expired_on_date"], orient="row"
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_churns_match_map_elements(seed: int) -> None:
+    memberships = random_memberships(seed)
+
+    assert_frame_equal(
+        load_churns(memberships).collect().sort("churn_dates"),
+        old_load_churns(memberships).collect().sort("churn_dates"),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_joins_match_map_elements(seed: int) -> None:
+    memberships = random_memberships(seed)
+
+    assert_frame_equal(
+        load_joins(memberships).collect().sort("join_dates"),
+        old_load_joins(memberships).collect().sort("join_dates"),
+    )
+
+
+def test_edge_cases_match_map_elements() -> None:
+    today = datetime.date.today()
+
+    def day(offset: int) -> datetime.date:
+        return today + datetime.timedelta(days=offset)
+
+    memberships = pl.LazyFrame(
+        [
+            # Expires today, yesterday and tomorrow
+            (1, day(-30), day(0)),
+            (2, day(-30), day(-1)),
+            (3, day(-30), day(1)),
+            # Renewed the day after, two days after, and overlapping
+            (4, day(-90), day(-60)),
+            (4, day(-59), day(-29)),
+            (4, day(-27), day(3)),
+            (5, day(-90), day(-40)),
+            (5, day(-60), day(-10)),
+        ],
+        schema=["neon_id", "start_date", "expired_on_date"],
+        orient="row",
+    )
+
+    assert_frame_equal(
+        load_churns(memberships).collect().sort("churn_dates"),
+        old_load_churns(memberships).collect().sort("churn_dates"),
+    )
+    assert_frame_equal(
+        load_joins(memberships).collect().sort("join_dates"),
+        old_load_joins(memberships).collect().sort("join_dates"),
+    )
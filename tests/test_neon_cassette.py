@@ -0,0 +1,78 @@
+"""A recorded cassette replays on a later day when the jobs run as the recording date"""
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from benchmarks.fake_neon import FakeNeon, FaultConfig, start_fake_neon
+from helpers import neon_cassette, neon_client
+from helpers.account_history import AccountHistory
+from helpers.get_neon_data import search_events
+from helpers.neon_cassette import Cassette, CassetteMode
+from helpers.neon_client import CassetteMissError
+
+RECORDED_ON = "2025-03-01"
+
+
+async def sync(session: aiohttp.ClientSession) -> tuple[dict, list]:
+    """Searches whose fields carry dates computed from the run date."""
+    events = await search_events(session, None)
+    history = AccountHistory()
+    await history.sync_memberships(session)
+    return events, history.memberships.rows()
+
+
+def run(record: bool = False) -> tuple[dict, list]:
+    """Run the searches against the fake Neon server, or only the cassette on replay."""
+
+    async def main() -> tuple[dict, list]:
+        if not record:
+            # Replay never reaches the network
+            async with aiohttp.ClientSession(base_url="http://127.0.0.1:9") as session:
+                return await sync(session)
+
+        fake = FakeNeon(100, FaultConfig())
+        runner, url = await start_fake_neon(fake)
+        try:
+            async with aiohttp.ClientSession(base_url=url) as session:
+                return await sync(session)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(name="recording")
+def fixture_recording(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    path = str(tmp_path / "neon.jsonl.gz")
+    monkeypatch.setattr(neon_cassette, "NEON_CASSETTE_DATE", RECORDED_ON)
+
+    cassette = Cassette(path, CassetteMode.RECORD)
+    monkeypatch.setattr(neon_client, "open_cassette", lambda: cassette)
+    recorded = run(record=True)
+    cassette.close()
+
+    return path, recorded
+
+
+def test_replays_as_of_the_recording_date(
+    recording, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path, recorded = recording
+    cassette = Cassette(path, CassetteMode.REPLAY)
+    monkeypatch.setattr(neon_client, "open_cassette", lambda: cassette)
+
+    assert run() == recorded
+
+
+def test_replay_misses_as_of_another_date(
+    recording, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path, _ = recording
+    cassette = Cassette(path, CassetteMode.REPLAY)
+    monkeypatch.setattr(neon_client, "open_cassette", lambda: cassette)
+    monkeypatch.setattr(neon_cassette, "NEON_CASSETTE_DATE", None)
+
+    with pytest.raises(CassetteMissError):
+        run()
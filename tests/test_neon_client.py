@@ -0,0 +1,167 @@
+"""Retries, throttling and the circuit breaker of neon_request, against the fake Neon API"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+import pytest
+
+from benchmarks.fake_neon import FakeNeon, FaultConfig, start_fake_neon
+from helpers import neon_client
+from helpers.neon_client import (
+    MAX_RETRIES,
+    CircuitBreaker,
+    CircuitOpenError,
+    NeonRequestError,
+    endpoint_stats,
+    neon_request,
+)
+from helpers.rate_limiter import AdaptiveRateLimiter
+
+MEMBERSHIPS_ENDPOINT = "GET /v2/accounts/{id}/memberships"
+
+
+@pytest.fixture(autouse=True)
+def fresh_client_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A limiter and circuit breaker of its own for every test, with quick backoff."""
+    endpoint_stats.clear()
+    monkeypatch.setattr(neon_client, "neon_limiter", AdaptiveRateLimiter(1000, 1000))
+    monkeypatch.setattr(neon_client, "circuit_breaker", CircuitBreaker(20, 60, 5))
+    monkeypatch.setattr(neon_client, "backoff_time", lambda *args, **kwargs: 0.01)
+
+
+def run_against(fake: FakeNeon, requests) -> list:
+    """Run requests(session) against the fake, returning each result or exception."""
+
+    async def main() -> list:
+        runner, base_url = await start_fake_neon(fake)
+        try:
+            async with aiohttp.ClientSession(base_url=base_url) as session:
+                return await asyncio.gather(*requests(session), return_exceptions=True)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def get_memberships(session: aiohttp.ClientSession, fake: FakeNeon) -> list:
+    return [
+        neon_request(session, "GET", f"/v2/accounts/{neon_id}/memberships")
+        for neon_id in fake.accounts
+    ]
+
+
+def test_retries_throttling_and_server_errors() -> None:
+    fake = FakeNeon(100, FaultConfig(throttle_rate=0.2, error_rate=0.2, retry_after=0))
+
+    results = run_against(fake, lambda session: get_memberships(session, fake))
+
+    assert results == [
+        {"memberships": acct.memberships} for acct in fake.accounts.values()
+    ]
+    stats = endpoint_stats[MEMBERSHIPS_ENDPOINT]
+    assert fake.injected > 0
+    assert stats.retries == fake.injected
+    assert 0 < stats.throttled < fake.injected
+    assert stats.errors == 0
+
+
+def test_gives_up_after_max_retries() -> None:
+    fake = FakeNeon(10, FaultConfig(error_rate=1.0))
+
+    [result] = run_against(
+        fake, lambda session: [neon_request(session, "GET", "/v2/accounts/1000")]
+    )
+
+    assert isinstance(result, NeonRequestError)
+    assert result.status == 502
+    assert fake.requests == MAX_RETRIES
+
+
+def test_does_not_retry_client_errors() -> None:
+    fake = FakeNeon(10, FaultConfig())
+
+    [result] = run_against(
+        fake, lambda session: [neon_request(session, "GET", "/v2/events/999999")]
+    )
+
+    assert isinstance(result, NeonRequestError)
+    assert result.status == 404
+    assert fake.requests == 1
+
+
+def test_waits_for_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeNeon(10, FaultConfig(throttle_rate=1.0, retry_after=0.3))
+    # Any wait longer than the backoff comes from the Retry-After header
+    monkeypatch.setattr(neon_client, "backoff_time", lambda *args, **kwargs: 0)
+
+    async def stop_throttling() -> None:
+        while fake.requests == 0:
+            await asyncio.sleep(0.01)
+        fake.faults.throttle_rate = 0.0
+
+    async def request(session: aiohttp.ClientSession) -> float:
+        start = time.monotonic()
+        await neon_request(session, "GET", "/v2/accounts/1000")
+        return time.monotonic() - start
+
+    _, elapsed = run_against(
+        fake, lambda session: [stop_throttling(), request(session)]
+    )
+
+    assert endpoint_stats["GET /v2/accounts/{id}"].throttled == 1
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_throttling_slows_the_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = AdaptiveRateLimiter(100, burst=10)
+    monkeypatch.setattr(neon_client, "neon_limiter", limiter)
+    fake = FakeNeon(60, FaultConfig(rate_limit=30, retry_after=0))
+
+    results = run_against(fake, lambda session: get_memberships(session, fake))
+
+    assert not any(isinstance(r, Exception) for r in results)
+    assert endpoint_stats[MEMBERSHIPS_ENDPOINT].throttled > 0
+    assert limiter.rate < 100
+
+
+def test_waits_out_an_outage(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(neon_client, "circuit_breaker", CircuitBreaker(5, 0.2, 50))
+    fake = FakeNeon(30, FaultConfig(error_rate=1.0))
+
+    async def end_outage() -> None:
+        await asyncio.sleep(1.0)
+        fake.faults.error_rate = 0.0
+
+    with caplog.at_level(logging.WARNING):
+        results = run_against(
+            fake, lambda session: [end_outage(), *get_memberships(session, fake)]
+        )
+
+    assert not any(isinstance(r, Exception) for r in results)
+    assert "pausing requests" in caplog.text
+    # Paused requests do not use up their retries during the outage
+    assert fake.requests < len(fake.accounts) * MAX_RETRIES
+
+
+def test_fails_fast_once_neon_is_down(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(neon_client, "circuit_breaker", CircuitBreaker(3, 0.05, 2))
+    fake = FakeNeon(10, FaultConfig(error_rate=1.0))
+
+    async def request_twice(session: aiohttp.ClientSession) -> int:
+        with pytest.raises(CircuitOpenError):
+            await neon_request(session, "GET", "/v2/accounts/1000")
+        sent = fake.requests
+
+        with pytest.raises(CircuitOpenError):
+            await neon_request(session, "GET", "/v2/accounts/1001")
+        return fake.requests - sent
+
+    [sent_after_giving_up] = run_against(fake, lambda session: [request_twice(session)])
+
+    # Three failures open the circuit, one more after the cooldown exhausts it
+    assert fake.requests == 4
+    assert sent_after_giving_up == 0
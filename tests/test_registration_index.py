@@ -0,0 +1,156 @@
+"""The registration index is kept between runs and only re-reads recent events"""
+
+import asyncio
+import datetime
+
+import aiohttp
+import pytest
+import sqlalchemy
+from sqlalchemy import insert
+
+from benchmarks.fake_neon import FakeNeon, FaultConfig, start_fake_neon
+from helpers import registration_index as registration_index_module
+from helpers.event_catalogue import EventCatalogue
+from helpers.get_neon_data import parse_event
+from helpers.neon_client import endpoint_stats
+from helpers.registration_index import RegistrationIndex
+from schema import EventInstance, EventRegistration, EventType
+
+REGISTRATIONS_ENDPOINT = "GET /v2/events/{id}/eventRegistrations"
+LOOKBACK_DAYS = 30
+
+
+@pytest.fixture(name="sql_engine")
+def fixture_sql_engine(tmp_path) -> sqlalchemy.Engine:
+    sql_engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    for table in (EventType, EventInstance, EventRegistration):
+        table.__table__.create(sql_engine)
+    return sql_engine
+
+
+def store_events(sql_engine: sqlalchemy.Engine, fake: FakeNeon) -> None:
+    """Store the fake events as EventCatalogue.save does on Postgres."""
+    events = {
+        int(e["id"]): parse_event(
+            e["name"], e["eventDates"]["startDate"], e["category"]["name"]
+        )
+        for e in fake.events.values()
+    }
+    names = sorted({e.event_type.name for e in events.values()})
+
+    with sql_engine.begin() as conn:
+        conn.execute(
+            insert(EventType),
+            [
+                {"id": i, "name": name, "category": None}
+                for i, name in enumerate(names, 1)
+            ],
+        )
+        conn.execute(
+            insert(EventInstance),
+            [
+                {
+                    "id": event_id,
+                    "event_type_id": names.index(e.event_type.name) + 1,
+                    "date": e.event_date,
+                }
+                for event_id, e in events.items()
+            ],
+        )
+
+
+def run_sync(
+    fake: FakeNeon, sql_engine: sqlalchemy.Engine, first_run: bool = False
+) -> RegistrationIndex:
+    """One nightly run: load the stored index, sync it from Neon and save it."""
+
+    async def sync() -> RegistrationIndex:
+        catalogue = EventCatalogue()
+        index = RegistrationIndex()
+        if not first_run:
+            catalogue.load(sql_engine)
+            index.load(sql_engine, catalogue)
+
+        runner, base_url = await start_fake_neon(fake)
+        try:
+            async with aiohttp.ClientSession(base_url=base_url) as session:
+                await index.sync(session, catalogue, lookback_days=LOOKBACK_DAYS)
+        finally:
+            await runner.cleanup()
+
+        return index
+
+    endpoint_stats.clear()
+    index = asyncio.run(sync())
+
+    if first_run:
+        store_events(sql_engine, fake)
+    index.save(sql_engine)
+
+    return index
+
+
+def registrations_of(index: RegistrationIndex, fake: FakeNeon) -> dict:
+    return {
+        neon_id: sorted(
+            (r.event_id, r.event_date, r.registration_amount)
+            for r in index.get(neon_id)
+        )
+        for neon_id in fake.accounts
+    }
+
+
+def recent_events(fake: FakeNeon) -> list[dict]:
+    """Events that started within the lookback window, read again on every run."""
+    cutoff = datetime.date.today() - datetime.timedelta(days=LOOKBACK_DAYS)
+    return [
+        e for e in fake.events.values() if e["eventDates"]["startDate"] >= str(cutoff)
+    ]
+
+
+def requests_made() -> int:
+    return endpoint_stats[REGISTRATIONS_ENDPOINT].requests
+
+
+def test_later_runs_only_read_recent_events(sql_engine: sqlalchemy.Engine) -> None:
+    fake = FakeNeon(300, FaultConfig(), events=200)
+
+    first = run_sync(fake, sql_engine, first_run=True)
+    assert requests_made() == len(fake.events)
+
+    second = run_sync(fake, sql_engine)
+    assert requests_made() == len(recent_events(fake))
+    assert second.complete
+    assert registrations_of(second, fake) == registrations_of(first, fake)
+
+
+def test_failed_event_is_retried_and_marks_index_incomplete(
+    sql_engine: sqlalchemy.Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fake = FakeNeon(300, FaultConfig(), events=200)
+    # An event well outside the lookback window
+    failing = min(fake.events, key=lambda i: fake.events[i]["eventDates"]["startDate"])
+    get_event_registrations = registration_index_module.get_event_registrations
+
+    async def fail_one(aio_session, event_id, stored_event):
+        if event_id == failing:
+            raise RuntimeError("Event unavailable")
+        return await get_event_registrations(aio_session, event_id, stored_event)
+
+    monkeypatch.setattr(registration_index_module, "get_event_registrations", fail_one)
+    first = run_sync(fake, sql_engine, first_run=True)
+
+    assert not first.complete
+    assert first.failed_events == 1
+
+    monkeypatch.setattr(
+        registration_index_module, "get_event_registrations", get_event_registrations
+    )
+    second = run_sync(fake, sql_engine)
+
+    assert second.complete
+    assert requests_made() == len(recent_events(fake)) + 1
+    assert {
+        str(failing) in {r.event_id for r in second.get(neon_id)}
+        for neon_id in fake.accounts
+    } == {True, False}